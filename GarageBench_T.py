@@ -0,0 +1,310 @@
+import argparse
+import cProfile
+import json
+import math
+import pstats
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from GarageTask_T import Car, ColumnarGarage, ConcurrentGarage, Garage, IndexedGarage, Motorbike, Truck
+
+# Garage implementations the benchmark can drive
+BACKENDS = {
+    "garage": Garage,
+    "columnar": ColumnarGarage,
+    "indexed": IndexedGarage,
+    "concurrent": ConcurrentGarage,
+}
+
+# Vehicles built and added per chunk, so huge fleets never exist twice in memory
+CHUNK_VEHICLES = 100000
+
+# Vehicles looked up / removed one at a time by the fix_vehicle and remove_vehicle_by_id stages
+# (at most a tenth of the fleet, so the type removals that follow still have work to do)
+SAMPLE_SIZE = 10000
+
+# Stage timings shorter than this are too noisy to judge scaling from
+MIN_SECONDS = 0.001
+
+STAGES = ("add_vehicle", "fix_vehicle", "fix_all_vehicles", "remove_vehicle_by_id",
+          "remove_vehicle_by_type", "remove_multiple_by_types", "empty_garage")
+
+_MAKES = ["Ford", "Toyota", "BMW", "Honda", "Volvo", "Tesla", "Scania", "Ducati"]
+_FUELS = ["Petrol", "Diesel", "Electric", "Hybrid"]
+
+
+def iter_fleet(vehicles, seed=0, chunk=CHUNK_VEHICLES):
+    """
+    Yield lists of synthetic vehicles (roughly equal shares of Car, Motorbike and Truck)
+    with IDs 1..vehicles, 'chunk' at a time. The same seed always gives the same fleet.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, vehicles, chunk):
+        stop = min(start + chunk, vehicles)
+        size = stop - start
+        kinds = rng.integers(0, 3, size).tolist()
+        makes = rng.integers(0, len(_MAKES), size).tolist()
+        fuels = rng.integers(0, len(_FUELS), size).tolist()
+        years = rng.integers(1990, 2026, size).tolist()
+        mileages = rng.integers(0, 300000, size).tolist()
+        batch = []
+        for vehicle_id, kind, make, fuel, year, mileage in zip(range(start + 1, stop + 1), kinds, makes,
+                                                                fuels, years, mileages):
+            common = (vehicle_id, _MAKES[make], "Model", year, mileage, _FUELS[fuel])
+            if kind == 0:
+                batch.append(Car(*common, doors=4, door_style="conventional", finish="Metallic"))
+            elif kind == 1:
+                batch.append(Motorbike(*common, transmission="Manual", seating_capacity=2,
+                                       storage="Panniers", engine="650cc twin"))
+            else:
+                batch.append(Truck(*common, cargo_capacity=1.5, drivetrain="RWD",
+                                   bed_length="6ft", is_electric=_FUELS[fuel] == "Electric"))
+        yield batch
+
+
+def _run_stages(garage_class, vehicles, seed, timings=None, peaks=None, profiler=None):
+    """
+    Fill a new garage with 'vehicles' synthetic vehicles and run every stage on it in turn.
+    Adds seconds and operation counts per stage to 'timings'; with tracemalloc running,
+    records each stage's peak traced bytes in 'peaks' (and the garage's own size).
+    A profiler is enabled only around the garage calls, not while vehicles are built.
+    """
+    garage = garage_class()
+    rng = np.random.default_rng(seed + 1)
+    sample_size = max(1, min(SAMPLE_SIZE, vehicles // 10))
+    sample = rng.choice(np.arange(1, vehicles + 1), size=sample_size, replace=False).tolist()
+
+    def start():
+        if profiler is not None:
+            profiler.enable()
+        return time.perf_counter()
+
+    def record(stage, started, ops):
+        seconds = time.perf_counter() - started
+        if profiler is not None:
+            profiler.disable()
+        if timings is not None:
+            entry = timings.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += ops
+        if peaks is not None:
+            peaks[stage] = max(peaks.get(stage, 0), tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+    if peaks is not None:
+        tracemalloc.reset_peak()
+    # Only the add_vehicle calls are timed, not building the vehicles.
+    add = garage.add_vehicle
+    for batch in iter_fleet(vehicles, seed):
+        started = start()
+        for vehicle in batch:
+            add(vehicle, detailed=False)
+        record("add_vehicle", started, len(batch))
+    del batch
+    if peaks is not None:
+        peaks["garage_bytes"] = tracemalloc.get_traced_memory()[0]
+
+    fix = garage.fix_vehicle
+    started = start()
+    for vehicle_id in sample:
+        fix(vehicle_id)
+    record("fix_vehicle", started, len(sample))
+
+    started = start()
+    garage.fix_all_vehicles()
+    record("fix_all_vehicles", started, vehicles)
+
+    remove = garage.remove_vehicle_by_id
+    started = start()
+    for vehicle_id in sample:
+        remove(vehicle_id)
+    record("remove_vehicle_by_id", started, len(sample))
+
+    started = start()
+    removed = len(garage.remove_vehicle_by_type(Car))
+    record("remove_vehicle_by_type", started, removed)
+
+    started = start()
+    removed = len(garage.remove_multiple_by_types([Motorbike]))
+    record("remove_multiple_by_types", started, removed)
+
+    started = start()
+    removed = garage.empty_garage()
+    record("empty_garage", started, removed)
+
+
+def run_benchmark(garage_class, vehicles, seed=0, trace_memory=True, repeat=3):
+    """
+    Time every Garage operation on a synthetic fleet of 'vehicles' vehicles.
+    As in Lab7Bench, each stage keeps its best time over 'repeat' runs, and peak memory
+    comes from one more run under tracemalloc so the timings are not slowed down by tracing.
+    """
+    timings = {}
+    for _ in range(max(1, repeat)):
+        run_timings = {}
+        _run_stages(garage_class, vehicles, seed, timings=run_timings)
+        for stage, (seconds, ops) in run_timings.items():
+            if stage not in timings or seconds < timings[stage][0]:
+                timings[stage] = (seconds, ops)
+    peaks = None
+    if trace_memory:
+        peaks = {}
+        tracemalloc.start()
+        try:
+            _run_stages(garage_class, vehicles, seed, peaks=peaks)
+        finally:
+            tracemalloc.stop()
+
+    results = {"vehicles": vehicles}
+    for stage in STAGES:
+        seconds, ops = timings[stage]
+        results[stage] = {
+            "seconds": round(seconds, 6),
+            "ops": ops,
+            "ops_per_second": round(ops / seconds, 1) if seconds else None,
+            "peak_bytes": peaks[stage] if peaks else None,
+        }
+    if peaks:
+        results["bytes_per_vehicle"] = round(peaks["garage_bytes"] / vehicles, 1) if vehicles else None
+    return results
+
+
+def profile_hot_spots(garage_class, vehicles, seed=0, limit=15):
+    """Run every stage once under cProfile and return the 'limit' functions with the most own time."""
+    profiler = cProfile.Profile()
+    _run_stages(garage_class, vehicles, seed, profiler=profiler)
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [{
+        "function": f"{filename}:{line}({name})",
+        "calls": calls,
+        "own_seconds": round(own, 6),
+        "cumulative_seconds": round(cumulative, 6),
+    } for (filename, line, name), (_, calls, own, cumulative, _) in rows]
+
+
+def scaling(runs):
+    """
+    For each stage, how the cost per operation grows between consecutive fleet sizes:
+    log(cost ratio) / log(size ratio). About 0 means constant time per operation;
+    about 1 means each operation gets linearly slower, i.e. the stage is quadratic overall.
+    Pairs where either timing is under MIN_SECONDS are skipped.
+    """
+    growth = {}
+    for smaller, larger in zip(runs, runs[1:]):
+        size_ratio = larger["vehicles"] / smaller["vehicles"]
+        if size_ratio <= 1:
+            continue
+        for stage in STAGES:
+            if min(smaller[stage]["seconds"], larger[stage]["seconds"]) < MIN_SECONDS:
+                continue
+            before = smaller[stage]["ops_per_second"]
+            after = larger[stage]["ops_per_second"]
+            if before and after:
+                exponent = math.log(before / after) / math.log(size_ratio)
+                growth.setdefault(stage, []).append(round(exponent, 3))
+    return growth
+
+
+def find_quadratic(growth, max_growth):
+    """Stages whose cost per operation grew faster than 'max_growth' between any two sizes."""
+    return [f"{stage}: cost per operation grows as n^{max(exponents):.2f}"
+            for stage, exponents in growth.items() if max(exponents) > max_growth]
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Return a list of regressions against a saved results file: stages whose throughput fell,
+    or whose peak memory rose, by more than 'tolerance' (a fraction) at the same fleet size.
+    Raises ValueError if the baseline drove a different backend or fleet seed.
+    """
+    for key in ("backend", "seed"):
+        if baseline.get(key) != results.get(key):
+            raise ValueError(f"Baseline was measured with {key} {baseline.get(key)!r}, "
+                             f"this run with {results.get(key)!r}.")
+    regressions = []
+    before_runs = {run["vehicles"]: run for run in baseline.get("runs", [])}
+    for run in results["runs"]:
+        before_run = before_runs.get(run["vehicles"])
+        if before_run is None:
+            continue
+        for stage in STAGES:
+            before, after = before_run.get(stage), run.get(stage)
+            if not isinstance(before, dict) or not isinstance(after, dict):
+                continue
+            label = f"{stage} @ {run['vehicles']}"
+            if before.get("ops_per_second") and after.get("ops_per_second") is not None:
+                if after["ops_per_second"] < before["ops_per_second"] * (1 - tolerance):
+                    regressions.append(f"{label}: {after['ops_per_second']:.0f} ops/s "
+                                       f"vs baseline {before['ops_per_second']:.0f}")
+            if before.get("peak_bytes") and after.get("peak_bytes") is not None:
+                if after["peak_bytes"] > before["peak_bytes"] * (1 + tolerance):
+                    regressions.append(f"{label}: peak {after['peak_bytes']} bytes "
+                                       f"vs baseline {before['peak_bytes']}")
+    return regressions
+
+
+def _parse_sizes(text):
+    # "1000,10000" or powers of ten such as "3-5" (10^3 to 10^5).
+    if "-" in text and "," not in text:
+        low, high = (int(part) for part in text.split("-", 1))
+        return [10 ** power for power in range(low, high + 1)]
+    return [int(float(part)) for part in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark and profile the Garage operations.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="garage", help="garage class to drive")
+    parser.add_argument("--sizes", type=_parse_sizes, default=_parse_sizes("3-5"),
+                        help="fleet sizes: comma separated, or a power-of-ten range like 3-7 (default: 3-5)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="also save the results to this file")
+    parser.add_argument("--baseline", help="results file to compare against; exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown / memory growth against the baseline (default: 0.2)")
+    parser.add_argument("--max-growth", type=float, default=0.5,
+                        help="largest allowed growth exponent of cost per operation; exit 1 above it (default: 0.5)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory runs")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="time each fleet size this many times and keep the best (default: 3)")
+    parser.add_argument("--profile", action="store_true", help="add cProfile hot spots for the largest size")
+    parser.add_argument("--profile-limit", type=int, default=15, help="hot spots to report (default: 15)")
+    args = parser.parse_args(argv)
+
+    garage_class = BACKENDS[args.backend]
+    sizes = sorted(args.sizes)
+    runs = [run_benchmark(garage_class, size, args.seed, trace_memory=not args.no_memory, repeat=args.repeat)
+            for size in sizes]
+    growth = scaling(runs)
+    results = {"backend": args.backend, "seed": args.seed, "repeat": max(1, args.repeat),
+               "runs": runs, "scaling": growth}
+    if args.profile:
+        results["hot_spots"] = profile_hot_spots(garage_class, sizes[-1], args.seed, args.profile_limit)
+
+    print(json.dumps(results, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(results, file, indent=2)
+
+    problems = find_quadratic(growth, args.max_growth)
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        try:
+            problems += compare_to_baseline(results, baseline, args.tolerance)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+    if problems:
+        print("Regressions:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,20 +9,45 @@
 # Garage should have a method to remove multiple Vehicles by their type.
 
 
+import bisect
+import csv
+import inspect
+import json
+import logging
+import math
+import os
+import shutil
+import sqlite3
+import sys
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Type
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Type, get_type_hints
+
+import numpy as np
+
+
+def _intern(value):
+    # Sharing one copy of repeated strings (makes, fuel types, door styles...) across the fleet.
+    return sys.intern(value) if type(value) is str else value
+
 
 # I defined a base class with shared attributes & abstract methods.
 class Vehicle(ABC):
+    # Slots instead of a per-instance __dict__; subclasses list only their own extra fields.
+    __slots__ = ("vehicle_id", "make", "model", "year", "mileage", "fuel_type")
+
     def __init__(self, vehicle_id: int, make: str, model: str, year: int,
                  mileage: float, fuel_type: str):
         # Storing common vehicle attributes here.
         self.vehicle_id = vehicle_id
-        self.make = make
-        self.model = model
+        self.make = _intern(make)
+        self.model = _intern(model)
         self.year = year
         self.mileage = mileage
-        self.fuel_type = fuel_type
+        self.fuel_type = _intern(fuel_type)
 
     @abstractmethod
     def honk(self) -> str:
@@ -58,13 +83,15 @@ class Vehicle(ABC):
 
 # This is my representation of a car with unique attributes.
 class Car(Vehicle):
+    __slots__ = ("doors", "door_style", "finish")
+
     def __init__(self, vehicle_id: int, make: str, model: str, year: int,
                  mileage: float, fuel_type: str, doors: int,
                  door_style: str, finish: str):
         super().__init__(vehicle_id, make, model, year, mileage, fuel_type)
         self.doors = doors
-        self.door_style = door_style
-        self.finish = finish
+        self.door_style = _intern(door_style)
+        self.finish = _intern(finish)
 
     def honk(self) -> str:
         return "Car beep beep!"
@@ -87,14 +114,16 @@ class Car(Vehicle):
 
 # More representation but for a motorbike with fancy attributes.
 class Motorbike(Vehicle):
+    __slots__ = ("transmission", "seating_capacity", "storage", "engine")
+
     def __init__(self, vehicle_id: int, make: str, model: str, year: int,
                  mileage: float, fuel_type: str, transmission: str,
                  seating_capacity: int, storage: str, engine: str):
         super().__init__(vehicle_id, make, model, year, mileage, fuel_type)
-        self.transmission = transmission
+        self.transmission = _intern(transmission)
         self.seating_capacity = seating_capacity
-        self.storage = storage
-        self.engine = engine
+        self.storage = _intern(storage)
+        self.engine = _intern(engine)
 
     def honk(self) -> str:
         return "Motorbike vroom!"
@@ -116,13 +145,15 @@ class Motorbike(Vehicle):
 
 # More representation this time for a truck with some more techy attributes, don't worry is not a Tesla lol.
 class Truck(Vehicle):
+    __slots__ = ("cargo_capacity", "drivetrain", "bed_length", "is_electric")
+
     def __init__(self, vehicle_id: int, make: str, model: str, year: int,
                  mileage: float, fuel_type: str, cargo_capacity: float,
                  drivetrain: str, bed_length: str, is_electric: bool = False):
         super().__init__(vehicle_id, make, model, year, mileage, fuel_type)
         self.cargo_capacity = cargo_capacity
-        self.drivetrain = drivetrain
-        self.bed_length = bed_length
+        self.drivetrain = _intern(drivetrain)
+        self.bed_length = _intern(bed_length)
         self.is_electric = is_electric
 
     def honk(self) -> str:
@@ -148,87 +179,1380 @@ class Truck(Vehicle):
         return details
 
 
+# Billing: a base charge plus a per-mile charge, registered per vehicle class.
+class Rate(NamedTuple):
+    base: float
+    per_mile: float
+
+    def bill(self, mileage: float) -> float:
+        return self.base + (mileage * self.per_mile)
+
+
+RATES: Dict[Type[Vehicle], Rate] = {}
+
+
+def register_rate(vehicle_class: Type[Vehicle], base: float, per_mile: float) -> None:
+    # User-added subclasses can register their own rate; otherwise they inherit their parent's.
+    RATES[vehicle_class] = Rate(base, per_mile)
+    rate_for.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def rate_for(vehicle_class: Type[Vehicle]) -> Rate:
+    # The rate of the closest registered class in the MRO.
+    for klass in vehicle_class.__mro__:
+        if klass in RATES:
+            return RATES[klass]
+    raise KeyError(f"No billing rate registered for {vehicle_class.__name__}.")
+
+
+register_rate(Vehicle, 80, 0.04)
+register_rate(Car, 100, 0.05)
+register_rate(Motorbike, 50, 0.03)
+register_rate(Truck, 150, 0.07)
+
+
+class BillingResult(NamedTuple):
+    vehicle_ids: np.ndarray  # in garage order
+    bills: np.ndarray  # one bill per vehicle, same order as vehicle_ids
+    subtotals: Dict[Type[Vehicle], float]  # total billed per vehicle class
+    grand_total: float
+
+
+def bill_fleet(vehicle_ids: np.ndarray, class_codes: np.ndarray, mileages: np.ndarray,
+               classes: List[Type[Vehicle]]) -> BillingResult:
+    # Bills a whole fleet at once: class_codes index into 'classes', so each class is
+    # looked up in the rate table once rather than once per vehicle.
+    class_rates = [rate_for(cls) for cls in classes]
+    bases = np.array([rate.base for rate in class_rates], dtype=np.float64)
+    per_mile = np.array([rate.per_mile for rate in class_rates], dtype=np.float64)
+    bills = bases[class_codes] + (mileages * per_mile[class_codes])
+    subtotals = np.bincount(class_codes, weights=bills, minlength=len(classes))
+    return BillingResult(
+        vehicle_ids,
+        bills,
+        {cls: float(total) for cls, total in zip(classes, subtotals.tolist())},
+        float(bills.sum()),
+    )
+
+
+# Garage events: the data of each operation, only turned into text when a sink asks for it.
+def _bill_line(vehicle: Vehicle, bill: float) -> str:
+    return f"Fix bill for Vehicle ID {vehicle.vehicle_id}: £{bill:.2f} – {vehicle.__class__.__name__}: {vehicle.basic_info()}"
+
+
+class VehicleAdded(NamedTuple):
+    vehicle: Vehicle
+    detailed: bool
+    add_newline: bool
+
+    def __str__(self) -> str:
+        text = self.vehicle.detailed_str() if self.detailed else f"Added: {self.vehicle.brief_str()}"
+        return text + "\n" if self.add_newline else text
+
+
+class VehiclesAdded(NamedTuple):
+    count: int
+
+    def __str__(self) -> str:
+        return f"Added {self.count} vehicle(s)."
+
+
+class VehicleBilled(NamedTuple):
+    vehicle: Vehicle
+    bill: float
+
+    def __str__(self) -> str:
+        return _bill_line(self.vehicle, self.bill)
+
+
+class FleetBilled(NamedTuple):
+    vehicles: Iterable[Vehicle]  # may be built lazily (ColumnarGarage), so format before changing the garage
+    result: BillingResult
+
+    def __str__(self) -> str:
+        return "\n".join(_bill_line(v, bill) for v, bill in zip(self.vehicles, self.result.bills.tolist()))
+
+
+class VehicleRemoved(NamedTuple):
+    vehicle: Vehicle
+
+    def __str__(self) -> str:
+        return (f"Removing vehicle with ID {self.vehicle.vehicle_id}: \n"
+                f"{self.vehicle.basic_info()}\n"
+                f"Removed vehicle with ID {self.vehicle.vehicle_id}.")
+
+
+class VehiclesRemovedByType(NamedTuple):
+    vehicle_type: Type[Vehicle]
+    removed: List[Vehicle]
+
+    def __str__(self) -> str:
+        name = self.vehicle_type.__name__
+        lines = [f"Removing vehicles of type {name}: "] if self.removed else []
+        lines.extend(v.basic_info() for v in self.removed)
+        lines.append(f"Removed {len(self.removed)} vehicle(s) of type {name}.")
+        return "\n".join(lines)
+
+
+class VehiclesBulkRemoved(NamedTuple):
+    vehicle_types: List[Type[Vehicle]]
+    removed: List[Vehicle]
+
+    def __str__(self) -> str:
+        lines = [f"Bulk removing vehicles of types {' and '.join(t.__name__ for t in self.vehicle_types)}:"]
+        lines.extend(v.brief_str() for v in self.removed)
+        lines.append(f"Bulk removed {len(self.removed)} vehicle(s) of types: "
+                     f"{', '.join(t.__name__ for t in self.vehicle_types)}.")
+        return "\n".join(lines)
+
+
+class GarageEmptied(NamedTuple):
+    count: int
+
+    def __str__(self) -> str:
+        return f"Garage emptied. {self.count} vehicle(s) removed."
+
+
+def print_sink(event) -> None:
+    # The classic console output.
+    text = str(event)
+    if text:
+        print(text)
+
+
+def logging_sink(logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+    # Sends events to a logger; the text is only built if the level is enabled.
+    logger = logger or logging.getLogger(__name__)
+
+    def sink(event) -> None:
+        logger.log(level, "%s", event)
+    return sink
+
+
 # Managing collection of vehicles with various operations.
 class Garage:
-    def __init__(self):
-        self.vehicles: List[Vehicle] = []
+    # Operations return their results; pass a sink (print_sink, logging_sink(...) or any
+    # callable taking an event) to also get the human-readable output. No sink, no output.
+    def __init__(self, sink=None):
+        self.sink = sink
+        # Vehicles are indexed by ID (a dict keeps insertion order, so it doubles as the list)
+        # and bucketed by their concrete class, which keeps ID and type operations O(1) / O(k).
+        self._by_id: Dict[int, Vehicle] = {}
+        self._by_type: Dict[Type[Vehicle], Dict[int, Vehicle]] = {}
+
+    @property
+    def vehicles(self) -> List[Vehicle]:
+        # A snapshot of the vehicles in the order they were added.
+        return list(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
 
+    def __iter__(self) -> Iterator[Vehicle]:
+        return iter(self.vehicles)
+
+    def __contains__(self, vehicle_id: int) -> bool:
+        return vehicle_id in self._by_id
+
+    def get_vehicle(self, vehicle_id: int) -> Optional[Vehicle]:
+        return self._by_id.get(vehicle_id)
+
+    def vehicles_of_type(self, vehicle_type: Type[Vehicle]) -> List[Vehicle]:
+        # Only the matching buckets are touched, not the whole garage.
+        return [v for cls in self._matching_types([vehicle_type]) for v in self._by_type[cls].values()]
+
+    def _check_new_id(self, vehicle_id: int) -> None:
+        # Refusing duplicate IDs, otherwise the index would silently drop a vehicle.
+        if vehicle_id in self:
+            raise ValueError(f"Vehicle ID {vehicle_id} is already in the garage.")
+
+    def _check_new_batch(self, vehicles: List[Vehicle]) -> None:
+        # A batch may not clash with the garage or repeat an ID within itself.
+        seen = set()
+        for v in vehicles:
+            if v.vehicle_id in seen:
+                raise ValueError(f"Vehicle ID {v.vehicle_id} appears twice in the batch.")
+            self._check_new_id(v.vehicle_id)
+            seen.add(v.vehicle_id)
+
+    def _index(self, vehicle: Vehicle) -> None:
+        self._check_new_id(vehicle.vehicle_id)
+        self._by_id[vehicle.vehicle_id] = vehicle
+        self._by_type.setdefault(type(vehicle), {})[vehicle.vehicle_id] = vehicle
+
+    def _discard(self, vehicle_id: int) -> Vehicle:
+        vehicle = self._by_id.pop(vehicle_id)
+        bucket = self._by_type[type(vehicle)]
+        del bucket[vehicle.vehicle_id]
+        if not bucket:
+            del self._by_type[type(vehicle)]
+        return vehicle
+
+    def _matching_types(self, vehicle_types: List[Type[Vehicle]]) -> List[Type[Vehicle]]:
+        # Stored classes that are (subclasses of) any of the given types, in first-added order.
+        return [cls for cls in self._by_type if issubclass(cls, tuple(vehicle_types))]
+
+    def _pop_types(self, vehicle_types: List[Type[Vehicle]]) -> List[Vehicle]:
+        # Detaching whole buckets, so the cost is the number of vehicles removed.
+        removed: List[Vehicle] = []
+        for cls in self._matching_types(vehicle_types):
+            bucket = self._by_type.pop(cls)
+            for vehicle_id in bucket:
+                del self._by_id[vehicle_id]
+            removed.extend(bucket.values())
+        return removed
+
+    def _clear(self) -> None:
+        self._by_id.clear()
+        self._by_type.clear()
+
+    def _billed_vehicles(self) -> Iterable[Vehicle]:
+        # What FleetBilled walks to print the bills, in the same order as _billing_columns().
+        return self.vehicles
+
+    def _billing_columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Type[Vehicle]]]:
+        # IDs, class codes and mileages in garage order, plus the classes the codes refer to.
+        vehicles = self._by_id.values()
+        classes = list(self._by_type)
+        code_of = {cls: code for code, cls in enumerate(classes)}
+        ids = np.fromiter(self._by_id, dtype=np.int64, count=len(vehicles))
+        codes = np.fromiter((code_of[type(v)] for v in vehicles), dtype=np.intp, count=len(vehicles))
+        mileages = np.fromiter((v.mileage for v in vehicles), dtype=np.float64, count=len(vehicles))
+        return ids, codes, mileages, classes
 
     # A bit of a clean-up to add_vehicle method now accepts an extra parameter "add_newline"
     # to control whether an extra blank line is printed after output.
-    def add_vehicle(self, vehicle: Vehicle, detailed: bool = True, add_newline: bool = True) -> None:
-        # Time to add a vehicle and show either detailed or short output.
-        self.vehicles.append(vehicle)
-        if detailed:
-            print(vehicle.detailed_str())
-        else:
-            print(f"Added: {vehicle.brief_str()}")
-        if add_newline:
-            print()  # Print a blank line only if add_newline is True
+    def add_vehicle(self, vehicle: Vehicle, detailed: bool = True, add_newline: bool = True) -> Vehicle:
+        # Time to add a vehicle and report either detailed or short output.
+        self._index(vehicle)
+        if self.sink is not None:
+            self.sink(VehicleAdded(vehicle, detailed, add_newline))
+        return vehicle
 
-    def fix_vehicle(self, vehicle_id: int) -> None:
-        # Now I can find a vehicle by ID and calculate its fix bill based on type.
-        vehicle = next((v for v in self.vehicles if v.vehicle_id == vehicle_id), None)
+    def add_vehicles(self, vehicles: Iterable[Vehicle]) -> int:
+        # Bulk insert: the batch is checked for duplicate IDs up front so it goes in whole or not
+        # at all, and it produces one summary event instead of one per vehicle.
+        vehicles = list(vehicles)
+        self._check_new_batch(vehicles)
+        for v in vehicles:
+            self._index(v)
+        if self.sink is not None:
+            self.sink(VehiclesAdded(len(vehicles)))
+        return len(vehicles)
+
+    def fix_vehicle(self, vehicle_id: int) -> Optional[float]:
+        # Now I can look a vehicle up by ID and calculate its fix bill from its rate.
+        vehicle = self.get_vehicle(vehicle_id)
         if vehicle is None:
-            return
-        if isinstance(vehicle, Car):
-            bill = 100 + (vehicle.mileage * 0.05)
-        elif isinstance(vehicle, Motorbike):
-            bill = 50 + (vehicle.mileage * 0.03)
-        elif isinstance(vehicle, Truck):
-            bill = 150 + (vehicle.mileage * 0.07)
-        else:
-            bill = 80 + (vehicle.mileage * 0.04)
-        print(f"Fix bill for Vehicle ID {vehicle.vehicle_id}: £{bill:.2f} – {vehicle.__class__.__name__}: {vehicle.basic_info()}")
-
-    def fix_all_vehicles(self) -> None:
-        # Finally get to fix all vehicles in the garage.
-        for v in self.vehicles:
-            self.fix_vehicle(v.vehicle_id)
-
-    def remove_vehicle_by_id(self, vehicle_id: int) -> None:
-        # Remove a specific vehicle by ID.
-        for v in self.vehicles:
-            if v.vehicle_id == vehicle_id:
-                print(f"Removing vehicle with ID {vehicle_id}: ")
-                print(v.basic_info())
-                self.vehicles.remove(v)
-                print(f"Removed vehicle with ID {vehicle_id}.")
-                return
+            return None
+        bill = rate_for(type(vehicle)).bill(vehicle.mileage)
+        if self.sink is not None:
+            self.sink(VehicleBilled(vehicle, bill))
+        return bill
 
-    def remove_vehicle_by_type(self, vehicle_type: Type[Vehicle]) -> None:
+    def fix_all_vehicles(self) -> BillingResult:
+        # Finally get to fix all vehicles in the garage: one vectorised pass over mileages and rates.
+        result = bill_fleet(*self._billing_columns())
+        if self.sink is not None:
+            self.sink(FleetBilled(self._billed_vehicles(), result))
+        return result
+
+    def remove_vehicle_by_id(self, vehicle_id: int) -> Optional[Vehicle]:
+        # Remove a specific vehicle by ID and hand it back.
+        if vehicle_id not in self:
+            return None
+        v = self._discard(vehicle_id)
+        if self.sink is not None:
+            self.sink(VehicleRemoved(v))
+        return v
+
+    def remove_vehicle_by_type(self, vehicle_type: Type[Vehicle]) -> List[Vehicle]:
         # Removing all vehicles of a given subclass type.
-        matching = [v for v in self.vehicles if isinstance(v, vehicle_type)]
-        if matching:
-            print(f"Removing vehicles of type {vehicle_type.__name__}: ")
-            for v in matching:
-                print(v.basic_info())
-        count = len(matching)
-        self.vehicles = [v for v in self.vehicles if not isinstance(v, vehicle_type)]
-        print(f"Removed {count} vehicle(s) of type {vehicle_type.__name__}.")
-
-    def remove_multiple_by_types(self, vehicle_types: List[Type[Vehicle]]) -> None:
+        matching = self._pop_types([vehicle_type])
+        if self.sink is not None:
+            self.sink(VehiclesRemovedByType(vehicle_type, matching))
+        return matching
+
+    def remove_multiple_by_types(self, vehicle_types: List[Type[Vehicle]]) -> List[Vehicle]:
         # Remove vehicles of multiple types at once.
-        types_header = " and ".join(t.__name__ for t in vehicle_types)
-        print(f"Bulk removing vehicles of types {types_header}:")
-        matching = [v for v in self.vehicles if any(isinstance(v, t) for t in vehicle_types)]
-        for v in matching:
-            print(v.brief_str())
-        count = len(matching)
-        self.vehicles = [v for v in self.vehicles if not any(isinstance(v, t) for t in vehicle_types)]
-        removed_types = ", ".join(t.__name__ for t in vehicle_types)
-        print(f"Bulk removed {count} vehicle(s) of types: {removed_types}.")
+        matching = self._pop_types(vehicle_types)
+        if self.sink is not None:
+            self.sink(VehiclesBulkRemoved(list(vehicle_types), matching))
+        return matching
 
-    def empty_garage(self) -> None:
+    def empty_garage(self) -> int:
         # It is about time to clear out all vehicles from the garage.
-        count = len(self.vehicles)
-        self.vehicles.clear()
-        print(f"Garage emptied. {count} vehicle(s) removed.")
+        count = len(self)
+        self._clear()
+        if self.sink is not None:
+            self.sink(GarageEmptied(count))
+        return count
+
+
+@lru_cache(maxsize=None)
+def _extra_fields(cls: Type[Vehicle]) -> Tuple[str, ...]:
+    # Slot names a Vehicle subclass adds on top of the common Vehicle fields, base class first.
+    fields: Tuple[str, ...] = ()
+    for klass in reversed(cls.__mro__):
+        if issubclass(klass, Vehicle) and klass is not Vehicle:
+            slots = klass.__dict__.get("__slots__", ())
+            fields += (slots,) if isinstance(slots, str) else tuple(slots)
+    return fields
+
+
+class _IdIndex:
+    """
+    Open-addressing vehicle_id -> row map stored in two typed arrays.
+    A dict of int -> int costs around a hundred bytes per entry; this costs about twenty,
+    which is what makes ColumnarGarage worthwhile for national-scale fleets.
+    """
+
+    _FREE = -1
+    _DELETED = -2
+
+    def __init__(self, capacity: int = 8):
+        self._reset(capacity)
+
+    def _reset(self, capacity: int) -> None:
+        self._keys = array("q", bytes(8 * capacity))
+        self._rows = array("q", [self._FREE]) * capacity
+        self._mask = capacity - 1
+        self._shift = 64 - (capacity.bit_length() - 1)
+        self._size = 0
+        self._used = 0  # live entries plus tombstones
+
+    @classmethod
+    def from_ids(cls, ids) -> "_IdIndex":
+        index = cls(max(8, 1 << (len(ids) * 2).bit_length()))
+        for row, vehicle_id in enumerate(ids):
+            index[vehicle_id] = row
+        return index
+
+    def _find(self, key: int) -> Tuple[int, int]:
+        # Returns (slot holding key or -1, first reusable slot on the probe path).
+        # Fibonacci hashing spreads sequential IDs before linear probing.
+        slot = ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+        reusable = -1
+        keys, rows = self._keys, self._rows
+        while True:
+            row = rows[slot]
+            if row == self._FREE:
+                return -1, slot if reusable < 0 else reusable
+            if row == self._DELETED:
+                if reusable < 0:
+                    reusable = slot
+            elif keys[slot] == key:
+                return slot, reusable
+            slot = (slot + 1) & self._mask
+
+    def get(self, key: int, default: Optional[int] = None) -> Optional[int]:
+        slot, _ = self._find(key)
+        return default if slot < 0 else self._rows[slot]
+
+    def __contains__(self, key: int) -> bool:
+        return self._find(key)[0] >= 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __setitem__(self, key: int, row: int) -> None:
+        slot, free = self._find(key)
+        if slot >= 0:
+            self._rows[slot] = row
+            return
+        if self._rows[free] == self._FREE:
+            self._used += 1
+        self._keys[free] = key
+        self._rows[free] = row
+        self._size += 1
+        if self._used * 3 > len(self._rows) * 2:
+            self._grow()
+
+    def pop(self, key: int) -> int:
+        slot, _ = self._find(key)
+        if slot < 0:
+            raise KeyError(key)
+        row = self._rows[slot]
+        self._rows[slot] = self._DELETED
+        self._size -= 1
+        return row
+
+    def _grow(self) -> None:
+        live = [(key, row) for key, row in zip(self._keys, self._rows) if row >= 0]
+        self._reset(max(8, 1 << (len(live) * 2).bit_length()))
+        for key, row in live:
+            self[key] = row
+
+
+# Same operations as Garage, but the fleet is kept as columns rather than one object per vehicle.
+class ColumnarGarage(Garage):
+    """
+    Struct-of-arrays Garage for very large fleets.
+    IDs, years, mileages and class codes live in typed arrays, make/model/fuel type are
+    dictionary-encoded, and each vehicle's subclass fields are dictionary-encoded as one tuple.
+    Vehicle objects are rebuilt on access, so changing a returned vehicle does not change
+    the stored row. Removing by ID moves the last row into the gap (so iteration is not in
+    insertion order), and removing by type compacts the columns in one vectorised pass.
+    """
+
+    # Column attribute names, kept in step row by row.
+    _COLUMNS = ("_ids", "_years", "_mileages", "_whole_mileage", "_class_codes",
+                "_makes", "_models", "_fuels", "_extras")
+
+    def __init__(self, sink=None):
+        # The object indexes of Garage are not used here, only the columns below.
+        self.sink = sink
+        self._clear()
+
+    def _clear(self) -> None:
+        # The dictionaries go too, so an emptied garage holds nothing of its old fleet.
+        self._classes: List[Type[Vehicle]] = []
+        self._class_code: Dict[Type[Vehicle], int] = {}
+        self._strings: List[str] = []
+        self._string_code: Dict[str, int] = {}
+        self._extras_pool: List[Optional[Tuple[Any, ...]]] = []
+        self._extras_code: Dict[Tuple[Any, ...], int] = {}
+        self._unshared_extras: set = set()  # pool entries owned by a single row
+        self._free_extras: List[int] = []  # released unshared entries, reused first
+        self._ids = array("q")
+        self._years = array("i")
+        self._mileages = array("d")
+        self._whole_mileage = array("b")  # 1 where the mileage was given as an int
+        self._class_codes = array("B")
+        self._makes = array("I")
+        self._models = array("I")
+        self._fuels = array("I")
+        self._extras = array("I")
+        self._row_of = _IdIndex()
+
+    def _encode(self, value: str) -> int:
+        code = self._string_code.get(value)
+        if code is None:
+            code = self._string_code[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def _encode_extras(self, extras: Tuple[Any, ...]) -> int:
+        try:
+            code = self._extras_code.get(extras)
+        except TypeError:
+            # Unhashable values (e.g. an instance dict) get a pool entry of their own,
+            # which is handed back by _release_extras() when the row goes.
+            if self._free_extras:
+                code = self._free_extras.pop()
+                self._extras_pool[code] = extras
+            else:
+                code = len(self._extras_pool)
+                self._extras_pool.append(extras)
+            self._unshared_extras.add(code)
+            return code
+        if code is None:
+            code = self._extras_code[extras] = len(self._extras_pool)
+            self._extras_pool.append(extras)
+        return code
+
+    def _release_extras(self, codes: Iterable[int]) -> None:
+        for code in codes:
+            if code in self._unshared_extras:
+                self._unshared_extras.discard(code)
+                self._extras_pool[code] = None
+                self._free_extras.append(code)
+
+    def _code_for_class(self, cls: Type[Vehicle]) -> int:
+        code = self._class_code.get(cls)
+        if code is None:
+            if len(self._classes) > 255:
+                raise ValueError("ColumnarGarage supports at most 256 vehicle classes.")
+            code = self._class_code[cls] = len(self._classes)
+            self._classes.append(cls)
+        return code
+
+    def _build(self, row: int) -> Vehicle:
+        cls = self._classes[self._class_codes[row]]
+        vehicle = cls.__new__(cls)
+        vehicle.vehicle_id = self._ids[row]
+        vehicle.make = self._strings[self._makes[row]]
+        vehicle.model = self._strings[self._models[row]]
+        vehicle.year = self._years[row]
+        mileage = self._mileages[row]
+        vehicle.mileage = int(mileage) if self._whole_mileage[row] else mileage
+        vehicle.fuel_type = self._strings[self._fuels[row]]
+        extras = self._extras_pool[self._extras[row]]
+        fields = _extra_fields(cls)
+        for name, value in zip(fields, extras):
+            setattr(vehicle, name, value)
+        if len(extras) > len(fields):
+            # Subclasses without __slots__ keep their instance dict as the last item.
+            vehicle.__dict__.update(extras[-1])
+        return vehicle
+
+    @property
+    def vehicles(self) -> List[Vehicle]:
+        return [self._build(row) for row in range(len(self._ids))]
+
+    def __iter__(self) -> Iterator[Vehicle]:
+        # One vehicle object at a time, instead of the whole fleet as a list.
+        for row in range(len(self._ids)):
+            yield self._build(row)
+
+    def _billed_vehicles(self) -> Iterable[Vehicle]:
+        return self
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, vehicle_id: int) -> bool:
+        return vehicle_id in self._row_of
+
+    def get_vehicle(self, vehicle_id: int) -> Optional[Vehicle]:
+        row = self._row_of.get(vehicle_id)
+        return None if row is None else self._build(row)
+
+    def vehicles_of_type(self, vehicle_type: Type[Vehicle]) -> List[Vehicle]:
+        return [self._build(row) for row in self._rows_of_types([vehicle_type]).tolist()]
+
+    def _matching_types(self, vehicle_types: List[Type[Vehicle]]) -> List[Type[Vehicle]]:
+        return [cls for cls in self._classes if issubclass(cls, tuple(vehicle_types))]
+
+    def _rows_of_types(self, vehicle_types: List[Type[Vehicle]]) -> np.ndarray:
+        codes = [self._class_code[cls] for cls in self._matching_types(vehicle_types)]
+        class_codes = np.frombuffer(self._class_codes, dtype=np.uint8)
+        return np.flatnonzero(np.isin(class_codes, codes))
+
+    def _index(self, vehicle: Vehicle) -> None:
+        self._check_new_id(vehicle.vehicle_id)
+        cls = type(vehicle)
+        extras = tuple(getattr(vehicle, name) for name in _extra_fields(cls))
+        if getattr(vehicle, "__dict__", None):
+            extras += (dict(vehicle.__dict__),)
+
+        self._row_of[vehicle.vehicle_id] = len(self._ids)
+        self._ids.append(vehicle.vehicle_id)
+        self._years.append(vehicle.year)
+        self._mileages.append(vehicle.mileage)
+        self._whole_mileage.append(isinstance(vehicle.mileage, int))
+        self._class_codes.append(self._code_for_class(cls))
+        self._makes.append(self._encode(vehicle.make))
+        self._models.append(self._encode(vehicle.model))
+        self._fuels.append(self._encode(vehicle.fuel_type))
+        self._extras.append(self._encode_extras(extras))
+
+    def _discard(self, vehicle_id: int) -> Vehicle:
+        row = self._row_of.pop(vehicle_id)
+        vehicle = self._build(row)
+        self._release_extras([self._extras[row]])
+        last = len(self._ids) - 1
+        if row != last:
+            # Filling the gap with the last row keeps removal O(1).
+            for name in self._COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            self._row_of[self._ids[row]] = row
+        for name in self._COLUMNS:
+            getattr(self, name).pop()
+        return vehicle
+
+    def _billing_columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Type[Vehicle]]]:
+        # The columns already are the billing input; copies so the arrays stay resizable.
+        # Codes are renumbered over the classes still present, so no class bills as an empty 0.0.
+        codes = np.frombuffer(self._class_codes, dtype=np.uint8).astype(np.intp)
+        present = np.unique(codes)
+        renumber = np.zeros(len(self._classes), dtype=np.intp)
+        renumber[present] = np.arange(len(present))
+        return (np.frombuffer(self._ids, dtype=np.int64).copy(),
+                renumber[codes],
+                np.frombuffer(self._mileages, dtype=np.float64).copy(),
+                [self._classes[code] for code in present.tolist()])
+
+    def _pop_types(self, vehicle_types: List[Type[Vehicle]]) -> List[Vehicle]:
+        rows = self._rows_of_types(vehicle_types)
+        if not len(rows):
+            return []
+        removed = [self._build(row) for row in rows.tolist()]
+        if self._unshared_extras:
+            self._release_extras(np.frombuffer(self._extras, dtype=self._extras.typecode)[rows].tolist())
+
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[rows] = False
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            kept = array(column.typecode)
+            kept.frombytes(np.frombuffer(column, dtype=column.typecode)[keep].tobytes())
+            setattr(self, name, kept)
+        self._row_of = _IdIndex.from_ids(self._ids)
+        return removed
+
+
+class _SortedEntries:
+    """
+    Sorted list of (mileage, vehicle_id) kept as short sorted blocks, so an insert or delete
+    shifts one block instead of the whole list. 'maxes' holds each block's last entry for bisect.
+    """
+
+    BLOCK = 1000
+
+    def __init__(self):
+        self._blocks: List[List[Tuple[float, int]]] = []
+        self._maxes: List[Tuple[float, int]] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Tuple[float, int]]:
+        return (entry for block in self._blocks for entry in block)
+
+    def add(self, entry: Tuple[float, int]) -> None:
+        blocks, maxes = self._blocks, self._maxes
+        self._size += 1
+        if not blocks:
+            blocks.append([entry])
+            maxes.append(entry)
+            return
+        i = min(bisect.bisect_left(maxes, entry), len(blocks) - 1)
+        block = blocks[i]
+        bisect.insort(block, entry)
+        maxes[i] = block[-1]
+        if len(block) > 2 * self.BLOCK:
+            blocks.insert(i + 1, block[self.BLOCK:])
+            del block[self.BLOCK:]
+            maxes.insert(i, block[-1])
+
+    def remove(self, entry: Tuple[float, int]) -> None:
+        blocks, maxes = self._blocks, self._maxes
+        i = bisect.bisect_left(maxes, entry)
+        block = blocks[i]
+        del block[bisect.bisect_left(block, entry)]
+        self._size -= 1
+        if block:
+            maxes[i] = block[-1]
+        else:
+            del blocks[i], maxes[i]
+
+    def rebuild(self, entries: Iterable[Tuple[float, int]]) -> None:
+        # Replace the contents with already sorted entries.
+        flat = list(entries)
+        self._blocks = [flat[i:i + self.BLOCK] for i in range(0, len(flat), self.BLOCK)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._size = len(flat)
+
+    def clear(self) -> None:
+        self.rebuild(())
+
+    def between(self, low: Tuple[float, int], high: Tuple[float, int]) -> Iterator[Tuple[float, int]]:
+        # Entries with low <= entry < high.
+        blocks, maxes = self._blocks, self._maxes
+        for i in range(bisect.bisect_left(maxes, low), len(blocks)):
+            block = blocks[i]
+            start = bisect.bisect_left(block, low) if block[0] < low else 0
+            if block[-1] < high:
+                yield from block[start:]
+            else:
+                yield from block[start:bisect.bisect_left(block, high)]
+                return
+
+
+# Fleet queries: a chain of filters answered from secondary indexes instead of a scan.
+class VehicleQuery:
+    """
+    Built by IndexedGarage.query(); each call narrows the selection and returns the query,
+    e.g. garage.query().of_type(Truck).fuel_type("Petrol").mileage_above(100000).built_before(2015).
+    Every filter is resolved to a set of IDs from its index, and the sets are intersected
+    smallest first. Results come back in vehicle ID order.
+    """
+
+    def __init__(self, garage: "IndexedGarage"):
+        self._garage = garage
+        self._filters: List[Any] = []
+
+    def _add(self, id_set) -> "VehicleQuery":
+        self._filters.append(id_set)
+        return self
+
+    def of_type(self, *vehicle_types: Type[Vehicle]) -> "VehicleQuery":
+        return self._add(lambda g: g._ids_of_types(list(vehicle_types)))
+
+    def make(self, *makes: str) -> "VehicleQuery":
+        return self._add(lambda g: g._union(g._by_make, makes))
+
+    def fuel_type(self, *fuel_types: str) -> "VehicleQuery":
+        return self._add(lambda g: g._union(g._by_fuel, fuel_types))
+
+    def built_between(self, first_year: Optional[int] = None, last_year: Optional[int] = None) -> "VehicleQuery":
+        # Inclusive on both ends; None leaves that end open.
+        return self._add(lambda g: g._ids_by_year(first_year, last_year))
+
+    def built_before(self, year: int) -> "VehicleQuery":
+        return self.built_between(None, year - 1)
+
+    def built_after(self, year: int) -> "VehicleQuery":
+        return self.built_between(year + 1, None)
+
+    def mileage_between(self, low: Optional[float] = None, high: Optional[float] = None,
+                        include_low: bool = True, include_high: bool = True) -> "VehicleQuery":
+        return self._add(lambda g: g._ids_by_mileage(low, high, include_low, include_high))
+
+    def mileage_above(self, mileage: float) -> "VehicleQuery":
+        return self.mileage_between(mileage, None, include_low=False)
+
+    def mileage_below(self, mileage: float) -> "VehicleQuery":
+        return self.mileage_between(None, mileage, include_high=False)
+
+    def ids(self) -> List[int]:
+        return self._garage._run_query(self._filters)
+
+    def all(self) -> List[Vehicle]:
+        get = self._garage.get_vehicle
+        return [get(vehicle_id) for vehicle_id in self.ids()]
+
+    def count(self) -> int:
+        return len(self.ids())
+
+    def __iter__(self) -> Iterator[Vehicle]:
+        return iter(self.all())
+
+
+class IndexedGarage(Garage):
+    """
+    Garage with secondary indexes on make, fuel type and year, and a mileage-sorted list
+    searched with bisect, all kept in step by every add / remove / empty. See query().
+    """
+
+    def __init__(self, sink=None):
+        super().__init__(sink)
+        self._by_make: Dict[str, set] = {}
+        self._by_fuel: Dict[str, set] = {}
+        self._by_year: Dict[int, set] = {}
+        self._by_mileage = _SortedEntries()  # (mileage, vehicle_id)
+
+    def query(self) -> VehicleQuery:
+        return VehicleQuery(self)
+
+    # Index maintenance
+    def _index(self, vehicle: Vehicle) -> None:
+        super()._index(vehicle)
+        vehicle_id = vehicle.vehicle_id
+        self._by_make.setdefault(vehicle.make, set()).add(vehicle_id)
+        self._by_fuel.setdefault(vehicle.fuel_type, set()).add(vehicle_id)
+        self._by_year.setdefault(vehicle.year, set()).add(vehicle_id)
+        self._by_mileage.add((vehicle.mileage, vehicle_id))
+
+    def _unindex_secondary(self, vehicle: Vehicle, mileage: bool = True) -> None:
+        vehicle_id = vehicle.vehicle_id
+        for index, key in ((self._by_make, vehicle.make), (self._by_fuel, vehicle.fuel_type),
+                           (self._by_year, vehicle.year)):
+            ids = index[key]
+            ids.discard(vehicle_id)
+            if not ids:
+                del index[key]
+        if mileage:
+            self._by_mileage.remove((vehicle.mileage, vehicle_id))
+
+    def _discard(self, vehicle_id: int) -> Vehicle:
+        vehicle = super()._discard(vehicle_id)
+        self._unindex_secondary(vehicle)
+        return vehicle
+
+    def _pop_types(self, vehicle_types: List[Type[Vehicle]]) -> List[Vehicle]:
+        removed = super()._pop_types(vehicle_types)
+        # Each single deletion shifts one block (about BLOCK entries), so a full filter pass only
+        # pays off once the removals would shift more than the whole index; otherwise it stays O(k).
+        rebuild = len(removed) * _SortedEntries.BLOCK > len(self._by_mileage)
+        for vehicle in removed:
+            self._unindex_secondary(vehicle, mileage=not rebuild)
+        if rebuild:
+            gone = {v.vehicle_id for v in removed}
+            self._by_mileage.rebuild(entry for entry in self._by_mileage if entry[1] not in gone)
+        return removed
+
+    def _clear(self) -> None:
+        super()._clear()
+        self._by_make.clear()
+        self._by_fuel.clear()
+        self._by_year.clear()
+        self._by_mileage.clear()
+
+    # Query helpers: each returns a set of IDs
+    def _ids_of_types(self, vehicle_types: List[Type[Vehicle]]) -> set:
+        return {vehicle_id for cls in self._matching_types(vehicle_types) for vehicle_id in self._by_type[cls]}
+
+    @staticmethod
+    def _union(index: Dict[Any, set], keys) -> set:
+        sets = [index[key] for key in keys if key in index]
+        return set().union(*sets) if len(sets) != 1 else set(sets[0])
+
+    def _ids_by_year(self, first_year: Optional[int], last_year: Optional[int]) -> set:
+        # Few distinct years, so checking each key is cheap.
+        return self._union(self._by_year, [year for year in self._by_year
+                                           if (first_year is None or year >= first_year)
+                                           and (last_year is None or year <= last_year)])
+
+    def _ids_by_mileage(self, low: Optional[float], high: Optional[float],
+                        include_low: bool, include_high: bool) -> set:
+        # IDs are never infinite, so (m, -inf) / (m, +inf) sort just before / after every entry at m.
+        start = (-math.inf, -math.inf) if low is None else (low, -math.inf if include_low else math.inf)
+        stop = (math.inf, math.inf) if high is None else (high, math.inf if include_high else -math.inf)
+        return {vehicle_id for _, vehicle_id in self._by_mileage.between(start, stop)}
+
+    def _run_query(self, filters) -> List[int]:
+        if not filters:
+            return sorted(self._by_id)
+        id_sets = sorted((make_set(self) for make_set in filters), key=len)
+        result = id_sets[0].intersection(*id_sets[1:])
+        return sorted(result)
+
+
+# Bulk import / export: one vehicle per CSV row or JSON line, with a "type" column naming the class.
+VEHICLE_TYPES: Dict[str, Type[Vehicle]] = {}
+_TYPE_NAMES: Dict[Type[Vehicle], str] = {}
+
+
+def register_vehicle_type(vehicle_class: Type[Vehicle], name: Optional[str] = None) -> None:
+    # The name used in the "type" column; defaults to the lower-cased class name.
+    name = (name or vehicle_class.__name__).lower()
+    VEHICLE_TYPES[name] = vehicle_class
+    _TYPE_NAMES[vehicle_class] = name
+
+
+register_vehicle_type(Car)
+register_vehicle_type(Motorbike)
+register_vehicle_type(Truck)
+
+
+def _to_number(value: Any) -> Any:
+    # Keeps whole numbers as ints so a loaded vehicle prints like a hand-built one.
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1", "yes", "y"):
+        return True
+    if text in ("false", "0", "no", "n"):
+        return False
+    raise ValueError(value)
+
+
+def _to_int(value: Any) -> int:
+    # JSON may hand over floats; only whole ones are accepted rather than truncated.
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(value)
+    return int(value)
+
+
+_CONVERTERS = {int: _to_int, float: _to_number, bool: _to_bool, str: str}
+
+
+@lru_cache(maxsize=None)
+def _field_spec(cls: Type[Vehicle]) -> Tuple[Tuple[str, Any, Any], ...]:
+    # (field name, converter, default) for each constructor argument, in constructor order.
+    hints = get_type_hints(cls.__init__)
+    params = list(inspect.signature(cls.__init__).parameters.values())[1:]
+    return tuple((p.name, _CONVERTERS.get(hints.get(p.name), _to_number if hints.get(p.name) is None else str),
+                  p.default) for p in params)
+
+
+def vehicle_from_record(record: Dict[str, Any]) -> Vehicle:
+    # Validates and converts one record, raising ValueError with the reason.
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    type_name = record.get("type")
+    cls = VEHICLE_TYPES.get(str(type_name).strip().lower())
+    if cls is None:
+        raise ValueError(f"unknown vehicle type {type_name!r}")
+    spec = _field_spec(cls)
+    try:
+        # Fast path: every field present and well-formed.
+        return cls(*[convert(record[name]) for name, convert, _ in spec])
+    except (KeyError, TypeError, ValueError):
+        pass
+
+    # Slow path: fill in defaults for missing fields, or say exactly what is wrong.
+    args = []
+    for name, convert, default in spec:
+        value = record.get(name)
+        if value is None or (value == "" and convert is not str):
+            if default is inspect.Parameter.empty:
+                raise ValueError(f"missing field '{name}' for {cls.__name__}")
+            args.append(default)
+            continue
+        try:
+            args.append(convert(value))
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid {name} {value!r} for {cls.__name__}") from None
+    try:
+        return cls(*args)
+    except TypeError as e:
+        raise ValueError(f"cannot build {cls.__name__}: {e}") from None
+
+
+def vehicle_to_record(vehicle: Vehicle) -> Dict[str, Any]:
+    cls = type(vehicle)
+    if cls not in _TYPE_NAMES:
+        raise ValueError(f"{cls.__name__} is not a registered vehicle type.")
+    record: Dict[str, Any] = {"type": _TYPE_NAMES[cls]}
+    for name, _, _ in _field_spec(cls):
+        record[name] = getattr(vehicle, name)
+    return record
+
+
+def _format_of(path: str, fmt: Optional[str]) -> str:
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    if fmt == "csv":
+        return "csv"
+    raise ValueError(f"Unsupported vehicle file format '{fmt}' (use csv or jsonl).")
+
+
+def _iter_raw_records(path: str, fmt: Optional[str]) -> Iterator[Tuple[int, Any]]:
+    # (line number, row dict) for CSV, (line number, unparsed line) for JSON Lines.
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        if _format_of(path, fmt) == "csv":
+            reader = csv.reader(file)
+            header = next(reader, [])
+            for row in reader:
+                if row:
+                    yield reader.line_num, dict(zip(header, row))
+        else:
+            for line_no, line in enumerate(file, 1):
+                if line.strip():
+                    yield line_no, line
+
+
+def _parse_record(raw: Any) -> Any:
+    if not isinstance(raw, str):
+        return raw
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"invalid JSON ({e})") from None
+
+
+def iter_vehicle_records(path: str, fmt: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    # Streams (line number, record) pairs from a CSV or JSON Lines file.
+    for line_no, raw in _iter_raw_records(path, fmt):
+        try:
+            record = _parse_record(raw)
+        except ValueError as e:
+            raise ValueError(f"{path}, line {line_no}: {e}") from None
+        yield line_no, record
+
+
+def load_vehicles(garage: Garage, path: str, fmt: Optional[str] = None,
+                  batch_size: int = 10000, on_invalid=None) -> int:
+    # Bulk-loads a CSV / JSON Lines file into the garage in batches, with one event per batch.
+    # Invalid records raise ValueError, unless on_invalid(line_no, message) is given to skip them.
+    # Duplicate IDs are caught per record, so add_vehicles() never rejects a whole batch.
+    loaded = 0
+    batch: List[Vehicle] = []
+    batch_ids = set()
+    for line_no, raw in _iter_raw_records(path, fmt):
+        try:
+            vehicle = vehicle_from_record(_parse_record(raw))
+            if vehicle.vehicle_id in batch_ids or vehicle.vehicle_id in garage:
+                raise ValueError(f"duplicate vehicle ID {vehicle.vehicle_id}")
+        except ValueError as e:
+            if on_invalid is None:
+                raise ValueError(f"{path}, line {line_no}: {e}") from None
+            on_invalid(line_no, str(e))
+            continue
+        batch.append(vehicle)
+        batch_ids.add(vehicle.vehicle_id)
+        if len(batch) >= batch_size:
+            loaded += garage.add_vehicles(batch)
+            batch = []
+            batch_ids.clear()
+    if batch:
+        loaded += garage.add_vehicles(batch)
+    return loaded
+
+
+def export_vehicles(garage: Garage, path: str, fmt: Optional[str] = None) -> int:
+    # Writes the whole fleet in the same layout load_vehicles() reads.
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if _format_of(path, fmt) == "csv":
+            columns = ["type"]
+            for cls in VEHICLE_TYPES.values():
+                columns.extend(name for name, _, _ in _field_spec(cls) if name not in columns)
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            for vehicle in garage:
+                writer.writerow(vehicle_to_record(vehicle))
+                count += 1
+        else:
+            for vehicle in garage:
+                file.write(json.dumps(vehicle_to_record(vehicle)) + "\n")
+                count += 1
+    return count
+
+
+# A Garage that survives restarts: a SQLite snapshot plus an append-only JSON Lines journal.
+class PersistentGarage(Garage):
+    """
+    Every add / remove / empty is appended to '<path>.journal' (and fsynced when sync=True)
+    before the call returns, so single operations never rewrite the fleet. Opening the garage
+    loads the snapshot at 'path' and replays the journal on top of it.
+    compact() rotates the journal and writes a fresh snapshot from a background thread;
+    it also runs on its own once the journal holds 'compact_after' entries. Journal entries
+    carry a sequence number and the snapshot records the last one it includes, so a
+    compaction interrupted at any point replays cleanly.
+    """
+
+    def __init__(self, path: str, sink=None, sync: bool = True, compact_after: int = 100000):
+        super().__init__(sink)
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.sync = sync
+        self.compact_after = compact_after
+        self._journal = None
+        self._journal_entries = 0
+        self._in_batch = False
+        self._seq = 0
+        self._compactor: Optional[threading.Thread] = None
+
+        self._seq = self._load_snapshot()
+        interrupted = os.path.exists(self.journal_path + ".old")
+        for journal_path in (self.journal_path + ".old", self.journal_path):
+            self._replay(journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        if interrupted:
+            # A compaction did not finish last time; fold everything into a new snapshot now.
+            self.compact(background=False)
+
+    # --- loading ---
+    def _load_snapshot(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        conn = sqlite3.connect(self.path)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'last_seq'").fetchone()
+            for (record,) in conn.execute("SELECT record FROM vehicles ORDER BY position"):
+                Garage._index(self, vehicle_from_record(json.loads(record)))
+        finally:
+            conn.close()
+        return int(row[0]) if row else 0
+
+    def _replay(self, journal_path: str) -> None:
+        if not os.path.exists(journal_path):
+            return
+        good_bytes = 0
+        with open(journal_path, "rb") as journal:
+            for line in journal:
+                try:
+                    # Every complete entry ends in a newline. One without it was cut short by a crash,
+                    # even if it happens to parse, and new entries must not be appended onto it.
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated journal entry")
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final write from a crash; drop it so new entries follow intact ones.
+                    os.truncate(journal_path, good_bytes)
+                    break
+                good_bytes += len(line)
+                if entry["seq"] <= self._seq:
+                    continue
+                self._seq = entry["seq"]
+                self._journal_entries += 1
+                self._apply(entry)
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        op = entry["op"]
+        if op == "add":
+            for record in entry["vehicles"]:
+                Garage._index(self, vehicle_from_record(record))
+        elif op == "remove":
+            for vehicle_id in entry["ids"]:
+                Garage._discard(self, vehicle_id)
+        elif op == "empty":
+            Garage._clear(self)
+
+    # --- journaling ---
+    # Each change is journaled first and applied in memory only once the entry is written,
+    # so a failure on the way (e.g. an unregistered vehicle type) leaves both sides unchanged.
+    def _log(self, op: str, **data: Any) -> None:
+        if self._journal is None:
+            return
+        seq = self._seq + 1
+        self._journal.write(json.dumps({"seq": seq, "op": op, **data}) + "\n")
+        self._flush()
+        self._seq = seq
+        self._journal_entries += 1
+
+    def _maybe_compact(self) -> None:
+        # Only called once the logged change is also in memory, so the snapshot includes it.
+        if self._journal is not None and self._journal_entries >= self.compact_after:
+            self.compact()
+
+    def _flush(self) -> None:
+        self._journal.flush()
+        if self.sync:
+            os.fsync(self._journal.fileno())
+
+    def _index(self, vehicle: Vehicle) -> None:
+        if self._in_batch:
+            super()._index(vehicle)
+            return
+        self._check_new_id(vehicle.vehicle_id)
+        self._log("add", vehicles=[vehicle_to_record(vehicle)])
+        super()._index(vehicle)
+        self._maybe_compact()
+
+    def add_vehicles(self, vehicles: Iterable[Vehicle]) -> int:
+        # The whole batch is checked and encoded up front, then becomes one journal entry
+        # with one flush / fsync.
+        vehicles = list(vehicles)
+        self._check_new_batch(vehicles)
+        records = [vehicle_to_record(v) for v in vehicles]
+        if records:
+            self._log("add", vehicles=records)
+        self._in_batch = True
+        try:
+            count = super().add_vehicles(vehicles)
+        finally:
+            self._in_batch = False
+        self._maybe_compact()
+        return count
+
+    def _discard(self, vehicle_id: int) -> Vehicle:
+        if vehicle_id not in self:
+            raise KeyError(vehicle_id)
+        self._log("remove", ids=[vehicle_id])
+        vehicle = super()._discard(vehicle_id)
+        self._maybe_compact()
+        return vehicle
+
+    def _pop_types(self, vehicle_types: List[Type[Vehicle]]) -> List[Vehicle]:
+        ids = [vehicle_id for cls in self._matching_types(vehicle_types) for vehicle_id in self._by_type[cls]]
+        if ids:
+            self._log("remove", ids=ids)
+        removed = super()._pop_types(vehicle_types)
+        self._maybe_compact()
+        return removed
+
+    def _clear(self) -> None:
+        self._log("empty")
+        super()._clear()
+        self._maybe_compact()
+
+    # --- compaction ---
+    def compact(self, background: bool = True) -> None:
+        # Rotating the journal is quick and happens here; the snapshot itself is written by a worker.
+        if self._compactor is not None and self._compactor.is_alive():
+            if background:
+                return
+            # A synchronous compaction must not be skipped; let the running one finish first.
+            self._compactor.join()
+        self._flush()
+        self._journal.close()
+        old_path = self.journal_path + ".old"
+        if os.path.exists(old_path):
+            # An earlier compaction failed and left its journal behind; keep those entries too.
+            with open(old_path, "a", encoding="utf-8") as old, \
+                    open(self.journal_path, "r", encoding="utf-8") as current:
+                shutil.copyfileobj(current, old)
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, old_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_entries = 0
+
+        vehicles = self.vehicles
+        args = (vehicles, self._seq)
+        if background:
+            self._compactor = threading.Thread(target=self._write_snapshot, args=args, daemon=True)
+            self._compactor.start()
+        else:
+            self._write_snapshot(*args)
+
+    def _write_snapshot(self, vehicles: List[Vehicle], last_seq: int) -> None:
+        tmp_path = self.path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            with conn:
+                conn.execute("CREATE TABLE vehicles (position INTEGER PRIMARY KEY, "
+                             "vehicle_id INTEGER NOT NULL UNIQUE, record TEXT NOT NULL)")
+                conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                conn.executemany("INSERT INTO vehicles VALUES (?, ?, ?)",
+                                 ((position, v.vehicle_id, json.dumps(vehicle_to_record(v)))
+                                  for position, v in enumerate(vehicles)))
+                conn.execute("INSERT INTO meta VALUES ('last_seq', ?)", (str(last_seq),))
+        finally:
+            conn.close()
+        os.replace(tmp_path, self.path)
+        os.remove(self.journal_path + ".old")
+
+    def close(self) -> None:
+        if self._compactor is not None:
+            self._compactor.join()
+        if self._journal is not None:
+            self._flush()
+            self._journal.close()
+            self._journal = None
+
+    def __enter__(self) -> "PersistentGarage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RWLock:
+    """
+    Reader-writer lock: any number of readers at once, writers alone. Waiting writers
+    hold back new readers so a steady stream of reads cannot starve them. A thread that
+    already holds the lock may take it again (a read inside a write is fine), but a
+    read cannot be upgraded to a write.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        if getattr(self._local, "depth", 0):
+            # Already inside read() or write() on this thread.
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+        if getattr(self._local, "depth", 0):
+            raise RuntimeError("Cannot upgrade a read lock to a write lock.")
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = me
+        self._local.depth = 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+
+# A Garage that can be shared between worker threads.
+class ConcurrentGarage(Garage):
+    """
+    Every operation takes a reader-writer lock: lookups and billing share it, while adds and
+    removals take it exclusively, so readers never block each other. fix_all_vehicles() only
+    holds the lock while copying the billing columns and computes the bills afterwards, so
+    month-end billing runs alongside inserts. Sink events are emitted while the lock is held.
+    """
+
+    def __init__(self, sink=None):
+        super().__init__(sink)
+        self._lock = RWLock()
+
+    # Reads
+    @property
+    def vehicles(self) -> List[Vehicle]:
+        with self._lock.read():
+            return super().vehicles
+
+    def __len__(self) -> int:
+        with self._lock.read():
+            return super().__len__()
+
+    def __contains__(self, vehicle_id: int) -> bool:
+        with self._lock.read():
+            return super().__contains__(vehicle_id)
+
+    def get_vehicle(self, vehicle_id: int) -> Optional[Vehicle]:
+        with self._lock.read():
+            return super().get_vehicle(vehicle_id)
+
+    def vehicles_of_type(self, vehicle_type: Type[Vehicle]) -> List[Vehicle]:
+        with self._lock.read():
+            return super().vehicles_of_type(vehicle_type)
+
+    def fix_vehicle(self, vehicle_id: int) -> Optional[float]:
+        with self._lock.read():
+            return super().fix_vehicle(vehicle_id)
+
+    def fix_all_vehicles(self) -> BillingResult:
+        with self._lock.read():
+            columns = self._billing_columns()
+            vehicles = super().vehicles if self.sink is not None else None
+        result = bill_fleet(*columns)
+        if vehicles is not None:
+            self.sink(FleetBilled(vehicles, result))
+        return result
+
+    # Writes
+    def add_vehicle(self, vehicle: Vehicle, detailed: bool = True, add_newline: bool = True) -> Vehicle:
+        with self._lock.write():
+            return super().add_vehicle(vehicle, detailed, add_newline)
+
+    def add_vehicles(self, vehicles: Iterable[Vehicle]) -> int:
+        vehicles = list(vehicles)
+        with self._lock.write():
+            return super().add_vehicles(vehicles)
+
+    def remove_vehicle_by_id(self, vehicle_id: int) -> Optional[Vehicle]:
+        with self._lock.write():
+            return super().remove_vehicle_by_id(vehicle_id)
+
+    def remove_vehicle_by_type(self, vehicle_type: Type[Vehicle]) -> List[Vehicle]:
+        with self._lock.write():
+            return super().remove_vehicle_by_type(vehicle_type)
+
+    def remove_multiple_by_types(self, vehicle_types: List[Type[Vehicle]]) -> List[Vehicle]:
+        with self._lock.write():
+            return super().remove_multiple_by_types(vehicle_types)
+
+    def empty_garage(self) -> int:
+        with self._lock.write():
+            return super().empty_garage()
 
 
 if __name__ == "__main__":
     # I instantiate the garage and some vehicles, then perform a ton of operations.
-    garage = Garage()
+    garage = Garage(sink=print_sink)
 
     car1 = Car(vehicle_id=1, make="Rolls-Royce", model="Phantom Serenity", year=2023,
                mileage=20000, fuel_type="Petrol", doors=4,
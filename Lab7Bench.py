@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from Lab7Task import aggregate_sales, load_sales, summarise_file, write_summary
+
+# Rows generated per write when building synthetic files
+CHUNK_ROWS = 100000
+
+
+def generate_sales_file(path, manufacturers, months=8, seed=0, max_units=50000):
+    """
+    Write a synthetic carSale.csv-format file: one name line and one numbers line
+    per manufacturer. Rows are produced in chunks so huge files need little memory.
+    """
+    rng = np.random.default_rng(seed)
+    width = len(str(manufacturers))
+    with open(path, "w") as file:
+        for start in range(0, manufacturers, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, manufacturers)
+            sales = rng.integers(0, max_units, size=(stop - start, months))
+            file.write("".join(
+                f"Manufacturer {number:0{width}d}\n" + ",".join(map(str, row)) + "\n"
+                for number, row in zip(range(start + 1, stop + 1), sales.tolist())
+            ))
+
+
+def _measure(stage, trace_memory):
+    """Run 'stage' once and return (seconds, peak traced bytes or None)."""
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        stage()
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return seconds, peak
+
+
+def run_benchmark(path, trace_memory=True, repeat=3):
+    """
+    Time parsing, aggregation and summary writing of Lab7Task on 'path'.
+    Each stage is timed on its own and the best of 'repeat' runs is kept, which filters out
+    most scheduling noise; with trace_memory one more run under tracemalloc records its
+    peak memory, so the timings are not slowed down by tracing.
+    """
+    state = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        summary_path = os.path.join(tmp, "summary.txt")
+
+        def parse():
+            state["companies"], state["sales"] = load_sales(path)
+
+        def aggregate():
+            state["report"] = aggregate_sales(state["sales"])
+
+        def write():
+            report = state["report"]
+            with open(summary_path, "w") as out:
+                write_summary(out, report.monthly_sales.tolist(),
+                              zip(state["companies"], report.yearly_sales.tolist()), report.grand_total)
+
+        def stream():
+            summarise_file(path, summary_path, echo=False)
+
+        results = {"source": path, "bytes": os.path.getsize(path)}
+        for name, stage in [("parse", parse), ("aggregate", aggregate),
+                            ("write_summary", write), ("stream", stream)]:
+            seconds = min(_measure(stage, trace_memory=False)[0] for _ in range(max(1, repeat)))
+            records = len(state["companies"])
+            results[name] = {
+                "seconds": round(seconds, 6),
+                "records_per_second": round(records / seconds, 1) if seconds else None,
+                "peak_bytes": _measure(stage, trace_memory=True)[1] if trace_memory else None,
+            }
+
+    results["manufacturers"] = len(state["companies"])
+    results["months"] = int(state["sales"].shape[1])
+    results["repeat"] = max(1, repeat)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Return a list of regressions: stages whose throughput fell, or whose peak memory rose,
+    by more than 'tolerance' (a fraction) relative to the baseline results.
+    Raises ValueError if the baseline was measured on a different number of manufacturers
+    or months, since its figures would not be comparable.
+    """
+    for key in ("manufacturers", "months"):
+        if baseline.get(key) != results.get(key):
+            raise ValueError(f"Baseline was measured with {baseline.get(key)} {key}, "
+                             f"this run with {results.get(key)}.")
+    regressions = []
+    for stage, before in baseline.items():
+        after = results.get(stage)
+        if not isinstance(before, dict) or not isinstance(after, dict):
+            continue
+        if before.get("records_per_second") and after.get("records_per_second") is not None:
+            if after["records_per_second"] < before["records_per_second"] * (1 - tolerance):
+                regressions.append(f"{stage}: {after['records_per_second']:.0f} records/s "
+                                   f"vs baseline {before['records_per_second']:.0f}")
+        if before.get("peak_bytes") and after.get("peak_bytes") is not None:
+            if after["peak_bytes"] > before["peak_bytes"] * (1 + tolerance):
+                regressions.append(f"{stage}: peak {after['peak_bytes']} bytes "
+                                   f"vs baseline {before['peak_bytes']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic car sales and benchmark Lab7Task.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write a synthetic sales file")
+    generate.add_argument("output", help="file to write")
+
+    run = commands.add_parser("run", help="time parsing, aggregation and summary writing")
+    run.add_argument("--source", help="existing sales file (default: generate one in a temp directory)")
+    run.add_argument("--json", dest="json_path", help="also save the results to this file")
+    run.add_argument("--baseline", help="results file to compare against; exit 1 on a regression")
+    run.add_argument("--tolerance", type=float, default=0.2,
+                     help="allowed slowdown / memory growth against the baseline (default: 0.2)")
+    run.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory runs")
+    run.add_argument("-r", "--repeat", type=int, default=3,
+                     help="time each stage this many times and keep the best (default: 3)")
+
+    for command in (generate, run):
+        command.add_argument("-n", "--manufacturers", type=int, default=100000)
+        command.add_argument("-m", "--months", type=int, default=12)
+        command.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        generate_sales_file(args.output, args.manufacturers, args.months, args.seed)
+        print(f"Wrote {args.manufacturers} manufacturer(s) x {args.months} month(s) to '{args.output}'")
+        return 0
+
+    if args.source:
+        results = run_benchmark(args.source, trace_memory=not args.no_memory, repeat=args.repeat)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "carSale.csv")
+            generate_sales_file(source, args.manufacturers, args.months, args.seed)
+            results = run_benchmark(source, trace_memory=not args.no_memory, repeat=args.repeat)
+
+    print(json.dumps(results, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        try:
+            regressions = compare_to_baseline(results, baseline, args.tolerance)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,59 +1,721 @@
+import argparse
+import glob
+import hashlib
+import json
 import os.path
+import shutil
+import sys
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, List, NamedTuple, Tuple
 
-# Initialise empty lists to store company data
-companies = []
-sales = []
+import numpy as np
 
+# Default input and output files
+SALES_FILE = "carSale.csv"
+SUMMARY_FILE = "car_sales_summary.txt"
+# Parsed sales matrices are cached here, next to the source file
+CACHE_DIR = ".sales_cache"
+# Lines (name + numbers pairs, so an even number) parsed per block by load_sales()
+PARSE_CHUNK_LINES = 200000
 
-# Check if the file exists
-if os.path.exists("carSale.csv"):
-    with open("carSale.csv", "r") as file:
-        lines = file.readlines()
 
-        # Process the file line by line
-        for i in range(0, len(lines), 2):
-            companies.append(lines[i].strip())
+class SalesTotals(NamedTuple):
+    """Totals gathered in a single pass over a sales file."""
+    monthly_sales: List[int]
+    grand_total: int
+    manufacturers: int
+    skipped: int
 
-            data = lines[i + 1].strip().split(',')
-            sales.append(list(map(int, data)))
 
-else:
-    print("Error: The file 'carSale.csv' does not exist.")
-    exit()
+class SalesReport(NamedTuple):
+    """Aggregates computed from a (manufacturers x months) sales matrix."""
+    monthly_sales: np.ndarray  # total per month, shape (months,)
+    yearly_sales: np.ndarray  # total per manufacturer, shape (manufacturers,)
+    grand_total: int
+    mean_sales: np.ndarray  # mean monthly sales per manufacturer
+    max_month: np.ndarray  # 0-based index of each manufacturer's best month
+    growth: np.ndarray  # month-over-month growth, shape (manufacturers, months - 1), NaN after a zero month
+    market_share: np.ndarray  # fraction of the grand total per manufacturer
 
 
-# Calculate the sum of cars sold in each month in a column
-monthly_sales = [sum(month) for month in zip(*sales)]
+def report_malformed(line_no, message):
+    """Default handler for records that cannot be parsed."""
+    print(f"Warning: line {line_no}: {message}")
 
-# "" "" total yearly sales by each manufacturer in a row
-yearly_sales = [sum(company_sales) for company_sales in sales]
 
-# "" "" the grand total of all car.py sales
-grand_total = sum(yearly_sales)
+def iter_records(path, on_malformed=report_malformed):
+    """
+    Lazily yield (company, sales) pairs from a name-line/numbers-line sales file.
+    Only the current pair is held in memory. Malformed pairs are passed to
+    'on_malformed' and skipped instead of stopping the whole run.
+    """
+    with open(path, "rb") as file:
+        for company, sales, _, _ in scan_records(file, on_malformed):
+            yield company, sales
 
 
-# Display the results
-print("\nMonthly sales totals:")
-for total in monthly_sales:
-    print(total)
+def scan_records(file, on_malformed=report_malformed, line_no=0, partial_tail=False, progress=None):
+    """
+    Yield (company, sales, end_offset, end_line) for each record of a binary file, starting
+    at its current position. 'end_offset'/'end_line' point just past the record's numbers line,
+    so a caller can resume from there later; 'line_no' is the number of lines already read.
+    With partial_tail=True an unfinished record at the end (a name with no numbers yet,
+    or a last line that is cut short) is left for the next run instead of reported; a last
+    numbers line that parses is still yielded, as a finished file may lack its final newline.
+    If given, the 'progress' dict is kept at the resume point past everything already handled,
+    malformed records included ("offset", "lines"), and "unterminated" says whether the record
+    just yielded ended without a newline.
+    """
+    offset = file.tell()
+    company = None
+    company_line = 0
+    if progress is not None:
+        progress.update(offset=offset, lines=line_no, unterminated=False)
+    for raw in file:
+        offset += len(raw)
+        line_no += 1
+        unterminated = not raw.endswith(b"\n")
+        line = raw.decode().strip()
+        if partial_tail and unterminated and (company is None or not line):
+            # Still being written; pick it up next time.
+            company = None
+            break
 
-print("\nYearly sales totals by manufacturer:")
-for company, total in zip(companies, yearly_sales):
-    print(f"{company}: {total}")
+        if not line:
+            continue
 
-print("\nGrand total of all car.py sales:", grand_total)
+        if company is None:
+            company, company_line = line, line_no
+            continue
 
+        try:
+            sales = [int(value) for value in line.split(',')]
+        except ValueError:
+            if partial_tail and unterminated:
+                break
+            if ',' in line:
+                # Looks like a numbers line, just a broken one.
+                on_malformed(line_no, f"invalid sales figures for '{company}': {line!r}")
+                company = None
+            else:
+                # Looks like the next company name, so the previous one lost its numbers.
+                on_malformed(company_line, f"no sales figures for '{company}'")
+                company, company_line = line, line_no
+                if progress is not None:
+                    progress.update(offset=offset - len(raw), lines=line_no - 1)
+            if company is None and progress is not None:
+                progress.update(offset=offset, lines=line_no)
+            continue
 
-# Save the results into an output file
-with open("car_sales_summary.txt", "w") as output_file:
-    output_file.write("Monthly sales totals:\n")
+        if progress is not None:
+            progress["unterminated"] = unterminated
+        yield company, sales, offset, line_no
+        company = None
+        if progress is not None:
+            progress.update(offset=offset, lines=line_no)
+
+    # An odd number of lines leaves a name without any numbers behind it.
+    if company is not None and not partial_tail:
+        on_malformed(company_line, f"no sales figures for '{company}' at end of file")
+
+
+def summarise_file(path, output_path=SUMMARY_FILE, echo=True):
+    """
+    Work out monthly, yearly and grand totals for 'path' in one pass and write the summary.
+    Memory use does not grow with the file: monthly totals are a single running row and
+    the per-manufacturer lines are spooled to a temporary file until the summary is written.
+    """
+    monthly_sales: List[int] = []
+    grand_total = 0
+    manufacturers = 0
+    skipped = 0
+
+    def on_malformed(line_no, message):
+        nonlocal skipped
+        skipped += 1
+        report_malformed(line_no, message)
+
+    with tempfile.TemporaryFile("w+") as yearly_lines:
+        for company, sales in iter_records(path, on_malformed):
+            # Pad the running row if this manufacturer reports more months than seen so far.
+            if len(sales) > len(monthly_sales):
+                monthly_sales.extend([0] * (len(sales) - len(monthly_sales)))
+            for month, total in enumerate(sales):
+                monthly_sales[month] += total
+
+            yearly_total = sum(sales)
+            grand_total += yearly_total
+            manufacturers += 1
+            yearly_lines.write(f"{company}: {yearly_total}\n")
+
+        save_summary(output_path, monthly_sales, yearly_lines, grand_total, echo)
+
+    return SalesTotals(monthly_sales, grand_total, manufacturers, skipped)
+
+
+def _load_sales_fast(path):
+    """
+    Parse a well-formed sales file in blocks of lines: names are split off and every block
+    of numbers lines goes to NumPy in one call. Returns (companies, sales), or None as soon
+    as anything is irregular (blank lines, a name without numbers, bad or ragged figures).
+    """
+    companies = []
+    blocks = []
+    months = None
+    with open(path, "rb") as file:
+        while True:
+            lines = list(islice(file, PARSE_CHUNK_LINES))
+            if not lines:
+                break
+            if len(lines) % 2:
+                return None
+            numbers = b"".join(lines[1::2])
+            text = np.frombuffer(numbers, dtype=np.uint8)
+            # Commas per numbers line, from where the commas and line ends fall.
+            line_ends = np.flatnonzero(text == ord("\n"))
+            if len(line_ends) < len(lines) // 2:
+                line_ends = np.append(line_ends, len(text))
+            commas = np.diff(np.searchsorted(np.flatnonzero(text == ord(",")), line_ends), prepend=0)
+            if months is None:
+                months = int(commas[0]) + 1
+            if np.any(commas != months - 1):
+                return None
+            try:
+                with warnings.catch_warnings():
+                    # NumPy only warns when it stops early on text it cannot parse.
+                    warnings.simplefilter("error")
+                    values = np.fromstring(numbers.replace(b"\n", b","), dtype=np.int64, sep=",")
+            except ValueError:
+                return None
+            if values.size != len(line_ends) * months:
+                return None
+            blocks.append(values.reshape(len(line_ends), months))
+            names = b"".join(lines[0::2]).decode().splitlines()
+            companies.extend(map(str.strip, names))
+    sales = np.concatenate(blocks) if blocks else None
+    # splitlines() also breaks on rarer separators, and a blank line leaves an empty name;
+    # either surprise means the slow path.
+    if sales is None or len(companies) != sales.shape[0] or "" in companies:
+        return None
+    return companies, sales
+
+
+def load_sales(path, on_malformed=report_malformed):
+    """
+    Load a sales file into a list of company names and a 2-D int64 sales matrix,
+    one row per manufacturer. Rows with fewer months are padded with zeros.
+    Well-formed files take a block-wise NumPy path; anything else is read record by
+    record so malformed records are reported and skipped as before.
+    """
+    loaded = _load_sales_fast(path)
+    if loaded is not None:
+        return loaded
+
+    companies = []
+    rows = []
+    for company, sales in iter_records(path, on_malformed):
+        companies.append(company)
+        rows.append(sales)
+
+    months = max(map(len, rows), default=0)
+    if all(len(row) == months for row in rows):
+        sales = np.array(rows, dtype=np.int64).reshape(len(rows), months)
+    else:
+        sales = np.zeros((len(rows), months), dtype=np.int64)
+        for i, row in enumerate(rows):
+            sales[i, :len(row)] = row
+    return companies, sales
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_paths(path, cache_dir=None):
+    """Return the (matrix, names, metadata) cache file paths for a sales file."""
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    stem = os.path.join(cache_dir, os.path.basename(path))
+    return stem + ".npy", stem + ".names", stem + ".json"
+
+
+def load_sales_cached(path, cache_dir=None, on_malformed=report_malformed):
+    """
+    Like load_sales(), but keep the parsed matrix as a memory-mappable .npy file plus a
+    name index. The cache is keyed by the source's size, mtime and SHA-256: a matching
+    size and mtime is trusted as is, and the hash is only checked when the mtime moved.
+    A cache hit maps the matrix read-only instead of parsing the text again.
+    """
+    matrix_path, names_path, meta_path = cache_paths(path, cache_dir)
+    stat = os.stat(path)
+    key = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    try:
+        with open(meta_path, "r") as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        meta = None
+
+    if meta is not None and meta.get("size") == key["size"]:
+        fresh = meta.get("mtime_ns") == key["mtime_ns"]
+        if not fresh and meta.get("sha256") == file_digest(path):
+            # Touched but not changed: remember the new mtime and keep the cache.
+            meta["mtime_ns"] = key["mtime_ns"]
+            _write_atomic(meta_path, lambda file: json.dump(meta, file), "w")
+            fresh = True
+        if fresh:
+            try:
+                sales = np.load(matrix_path, mmap_mode="r")
+                with open(names_path, "r") as names_file:
+                    companies = names_file.read().splitlines()
+            except (OSError, ValueError):
+                pass
+            else:
+                if len(companies) == sales.shape[0]:
+                    return companies, sales
+
+    companies, sales = load_sales(path, on_malformed)
+    os.makedirs(os.path.dirname(matrix_path), exist_ok=True)
+    _write_atomic(matrix_path, lambda file: np.save(file, sales), "wb")
+    _write_atomic(names_path, lambda file: file.writelines(name + "\n" for name in companies), "w")
+    key["sha256"] = file_digest(path)
+    _write_atomic(meta_path, lambda file: json.dump(key, file), "w")
+    return companies, sales
+
+
+def _write_atomic(path, write, mode):
+    """Write through a temporary file and rename it over 'path'."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, mode) as file:
+        write(file)
+    os.replace(tmp_path, path)
+
+
+def aggregate_sales(sales):
+    """Compute every aggregate for a sales matrix with vectorised reductions."""
+    sales = np.asarray(sales, dtype=np.int64)
+    monthly_sales = sales.sum(axis=0)
+    yearly_sales = sales.sum(axis=1)
+    grand_total = int(yearly_sales.sum())
+
+    if sales.shape[1]:
+        mean_sales = yearly_sales / sales.shape[1]
+        max_month = sales.argmax(axis=1)
+    else:
+        mean_sales = np.zeros(sales.shape[0])
+        max_month = np.zeros(sales.shape[0], dtype=np.intp)
+
+    previous = sales[:, :-1]
+    growth = np.divide(np.diff(sales, axis=1), previous,
+                       out=np.full(previous.shape, np.nan), where=previous != 0)
+
+    if grand_total:
+        market_share = yearly_sales / grand_total
+    else:
+        market_share = np.zeros(yearly_sales.shape)
+
+    return SalesReport(monthly_sales, yearly_sales, grand_total,
+                       mean_sales, max_month, growth, market_share)
+
+
+def summarise_sales(companies, sales, output_path=SUMMARY_FILE, echo=True):
+    """Aggregate an in-memory sales matrix and write the usual summary file."""
+    report = aggregate_sales(sales)
+    monthly_sales = report.monthly_sales.tolist()
+    yearly_lines = list(zip(companies, report.yearly_sales.tolist()))
+    save_summary(output_path, monthly_sales, yearly_lines, report.grand_total, echo)
+    return report
+
+
+class SalesIndex:
+    """
+    Per-manufacturer prefix sums over a sales matrix for month-range queries.
+    Months are 1-based and ranges are inclusive, so (3, 7) means March to July.
+    Any range total is two lookups; top-N uses a partial sort over the range totals.
+    """
+
+    def __init__(self, companies, sales=None, cumulative=None):
+        self.companies = list(companies)
+        if cumulative is None:
+            sales = np.asarray(sales, dtype=np.int64)
+            # Column k holds the total of the first k months, so column 0 is all zeros.
+            cumulative = np.zeros((sales.shape[0], sales.shape[1] + 1), dtype=np.int64)
+            np.cumsum(sales, axis=1, out=cumulative[:, 1:])
+        self._cumulative = cumulative
+        self.months = cumulative.shape[1] - 1
+        self._positions = None
+
+    @classmethod
+    def cached(cls, path, cache_dir=None, on_malformed=report_malformed):
+        """
+        Index for 'path' built on load_sales_cached(), with the prefix sums kept next to the
+        cached matrix ('.cumsum.npy') so a repeat query maps them instead of recomputing.
+        The prefix sums are rebuilt whenever the matrix cache is newer than they are.
+        """
+        companies, sales = load_sales_cached(path, cache_dir, on_malformed)
+        matrix_path = cache_paths(path, cache_dir)[0]
+        cumsum_path = matrix_path[:-len(".npy")] + ".cumsum.npy"
+        try:
+            if os.stat(cumsum_path).st_mtime_ns >= os.stat(matrix_path).st_mtime_ns:
+                cumulative = np.load(cumsum_path, mmap_mode="r")
+                if cumulative.shape == (sales.shape[0], sales.shape[1] + 1):
+                    return cls(companies, cumulative=cumulative)
+        except (OSError, ValueError):
+            pass
+        index = cls(companies, sales)
+        _write_atomic(cumsum_path, lambda file: np.save(file, index._cumulative), "wb")
+        return index
+
+    def _columns(self, first_month, last_month):
+        if not 1 <= first_month <= last_month <= self.months:
+            raise ValueError(f"Month range {first_month}-{last_month} is outside 1-{self.months}.")
+        return first_month - 1, last_month
+
+    def _row(self, company):
+        if self._positions is None:
+            # Built on first use so pure top-N work never pays for it.
+            self._positions = {name: i for i, name in enumerate(self.companies)}
+        try:
+            return self._positions[company]
+        except KeyError:
+            raise KeyError(f"Unknown manufacturer '{company}'.") from None
+
+    def range_total(self, company, first_month, last_month) -> int:
+        """Total sales for one manufacturer over a month range."""
+        start, stop = self._columns(first_month, last_month)
+        row = self._cumulative[self._row(company)]
+        return int(row[stop] - row[start])
+
+    def range_totals(self, first_month, last_month) -> np.ndarray:
+        """Totals for every manufacturer over a month range."""
+        start, stop = self._columns(first_month, last_month)
+        return self._cumulative[:, stop] - self._cumulative[:, start]
+
+    def top_n(self, n, first_month, last_month) -> List[Tuple[str, int]]:
+        """The n best-selling manufacturers over a month range, best first."""
+        totals = self.range_totals(first_month, last_month)
+        n = min(n, len(totals))
+        if n <= 0:
+            return []
+        if n < len(totals):
+            # Everything above the n-th largest total, then as many of the totals equal to it
+            # as still fit, taken in file order so the cut does not depend on the partition.
+            threshold = np.partition(totals, len(totals) - n)[len(totals) - n]
+            above = np.flatnonzero(totals > threshold)
+            best = np.concatenate([above, np.flatnonzero(totals == threshold)[:n - len(above)]])
+        else:
+            best = np.arange(len(totals))
+        # Stable sort on the negated totals keeps file order between equal totals.
+        best = best[np.argsort(-totals[best], kind="stable")]
+        return [(self.companies[i], int(totals[i])) for i in best]
+
+
+def parse_months(text, months):
+    """Parse a month range such as "3-7", "5" or "Q2" into an inclusive (first, last) pair."""
+    text = text.strip().upper()
+    if text.startswith("Q") and text[1:].isdigit():
+        quarter = int(text[1:])
+        return 3 * quarter - 2, 3 * quarter
+    if not text:
+        return 1, months
+    first, dash, last = text.partition("-")
+    try:
+        return int(first), int(last if dash else first)
+    except ValueError:
+        raise ValueError(f"Invalid month range '{text}'.") from None
+
+
+def expand_sources(source):
+    """Turn a directory or glob pattern into a sorted list of sales files."""
+    if os.path.isdir(source):
+        source = os.path.join(source, "*.csv")
+    return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+
+
+def partial_totals(path):
+    """
+    Map step: total a single file.
+    Returns (monthly sales, {company: yearly total}, skipped records); companies keep file order.
+    """
+    monthly_sales: List[int] = []
+    yearly_sales: Dict[str, int] = {}
+    skipped = 0
+
+    def on_malformed(line_no, message):
+        nonlocal skipped
+        skipped += 1
+        report_malformed(line_no, f"{path}: {message}")
+
+    for company, sales in iter_records(path, on_malformed):
+        if len(sales) > len(monthly_sales):
+            monthly_sales.extend([0] * (len(sales) - len(monthly_sales)))
+        for month, total in enumerate(sales):
+            monthly_sales[month] += total
+        yearly_sales[company] = yearly_sales.get(company, 0) + sum(sales)
+
+    return monthly_sales, yearly_sales, skipped
+
+
+def merge_totals(partials):
+    """Reduce step: add up partial totals, keeping manufacturers in first-seen order."""
+    monthly_sales: List[int] = []
+    yearly_sales: Dict[str, int] = {}
+    skipped = 0
+    for part_monthly, part_yearly, part_skipped in partials:
+        if len(part_monthly) > len(monthly_sales):
+            monthly_sales.extend([0] * (len(part_monthly) - len(monthly_sales)))
+        for month, total in enumerate(part_monthly):
+            monthly_sales[month] += total
+        for company, total in part_yearly.items():
+            yearly_sales[company] = yearly_sales.get(company, 0) + total
+        skipped += part_skipped
+    return monthly_sales, yearly_sales, skipped
+
+
+def summarise_files(paths, output_path=SUMMARY_FILE, workers=None, echo=True):
+    """
+    Total many sales files (one per region or dealer) in a process pool and write one
+    combined summary. The same manufacturer appearing in several files is added together.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) == 1:
+        partials = map(partial_totals, paths)
+        monthly_sales, yearly_sales, skipped = merge_totals(partials)
+    else:
+        # Bigger chunks keep the per-task overhead low when there are thousands of small files.
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = pool.map(partial_totals, paths, chunksize=chunksize)
+            monthly_sales, yearly_sales, skipped = merge_totals(partials)
+
+    grand_total = sum(yearly_sales.values())
+    save_summary(output_path, monthly_sales, yearly_sales.items(), grand_total, echo)
+    return SalesTotals(monthly_sales, grand_total, len(yearly_sales), skipped)
+
+
+def state_path_for(path, cache_dir=None):
+    """Where the running totals for 'path' are kept."""
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    return os.path.join(cache_dir, os.path.basename(path) + ".state.json")
+
+
+def _head_digest(path, length):
+    """SHA-256 of the first 'length' bytes (capped at 64 KiB), used to spot a replaced file."""
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read(min(length, 1 << 16))).hexdigest()
+
+
+def summarise_incremental(path, output_path=SUMMARY_FILE, state_path=None, echo=True):
+    """
+    Keep persisted running totals for an append-only sales file and only read the new tail.
+    The state holds one yearly line per record (like summarise_file(), a manufacturer that
+    appears twice gets two lines), the per-month totals, the grand total and how far the file
+    has been processed. If the file shrank or its head changed, totals are rebuilt from scratch.
+    A last record without its final newline is counted, but remembered: if the file grows past it
+    the line may have been cut short, so its figures are taken back out and it is read again.
+    The summary file is rewritten from the state on every run.
+    """
+    state_path = state_path or state_path_for(path)
+    try:
+        with open(state_path, "r") as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        state = None
+
+    size = os.path.getsize(path)
+    # States from before yearly lines were kept per record are rebuilt too.
+    if (state is None or "yearly_lines" not in state or state["offset"] > size
+            or state["head_sha256"] != _head_digest(path, state["offset"])):
+        state = {"offset": 0, "lines": 0, "head_sha256": "",
+                 "monthly_sales": [], "yearly_lines": [], "grand_total": 0, "tail": None}
+
+    monthly_sales = state["monthly_sales"]
+    yearly_lines = state["yearly_lines"]
+    skipped = 0
+
+    tail = state.get("tail")
+    if tail and size > state["offset"]:
+        # The tail record is always the last one counted.
+        _, yearly_total = yearly_lines.pop()
+        for month, total in enumerate(tail["sales"]):
+            monthly_sales[month] -= total
+        del monthly_sales[tail["months"]:]
+        state["grand_total"] -= yearly_total
+        state["offset"], state["lines"] = tail["offset"], tail["lines"]
+    if size > state["offset"]:
+        state["tail"] = None
+
+    def on_malformed(line_no, message):
+        nonlocal skipped
+        skipped += 1
+        report_malformed(line_no, message)
+
+    with open(path, "rb") as file:
+        file.seek(state["offset"])
+        progress = {}
+        records = scan_records(file, on_malformed, state["lines"], partial_tail=True, progress=progress)
+        for company, sales, _, _ in records:
+            if progress["unterminated"]:
+                state["tail"] = {"offset": progress["offset"], "lines": progress["lines"],
+                                 "sales": sales, "months": len(monthly_sales)}
+            if len(sales) > len(monthly_sales):
+                monthly_sales.extend([0] * (len(sales) - len(monthly_sales)))
+            for month, total in enumerate(sales):
+                monthly_sales[month] += total
+            yearly_total = sum(sales)
+            yearly_lines.append([company, yearly_total])
+            state["grand_total"] += yearly_total
+        if progress:
+            # Past malformed records as well, so they are reported only once.
+            state["offset"], state["lines"] = progress["offset"], progress["lines"]
+
+    state["head_sha256"] = _head_digest(path, state["offset"])
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    _write_atomic(state_path, lambda file: json.dump(state, file), "w")
+
+    save_summary(output_path, monthly_sales, yearly_lines, state["grand_total"], echo)
+    return SalesTotals(monthly_sales, state["grand_total"], len(yearly_lines), skipped)
+
+
+def write_statistics(out, companies, report):
+    """Write the per-manufacturer mean, best month, market share and growth."""
+    out.write("\nPer-manufacturer statistics:\n")
+    for i, company in enumerate(companies):
+        growth = ", ".join("n/a" if np.isnan(g) else f"{g:+.1%}" for g in report.growth[i])
+        out.write(f"{company}: mean {report.mean_sales[i]:.1f}, "
+                  f"best month {report.max_month[i] + 1}, "
+                  f"share {report.market_share[i]:.2%}, "
+                  f"growth [{growth}]\n")
+
+
+def write_summary(out, monthly_sales, yearly_lines, grand_total):
+    """
+    Write the summary layout used by car_sales_summary.txt.
+    'yearly_lines' is either an iterable of (company, total) pairs or an open
+    spool file of already formatted "company: total" lines.
+    """
+    out.write("Monthly sales totals:\n")
     for total in monthly_sales:
-        output_file.write(str(total) + "\n")
+        out.write(str(total) + "\n")
+
+    out.write("\nYearly sales totals by manufacturer:\n")
+    if hasattr(yearly_lines, "seek"):
+        yearly_lines.seek(0)
+        shutil.copyfileobj(yearly_lines, out)
+    else:
+        for company, total in yearly_lines:
+            out.write(f"{company}: {total}\n")
+
+    out.write("\nGrand total of all car.py sales: " + str(grand_total))
+
+
+def save_summary(output_path, monthly_sales, yearly_lines, grand_total, echo=True):
+    """Save the summary to 'output_path' and, if asked, display it as well."""
+    if echo and not hasattr(yearly_lines, "seek") and iter(yearly_lines) is yearly_lines:
+        # A one-shot iterator would be used up by the file write.
+        yearly_lines = list(yearly_lines)
+
+    # Save the results into an output file
+    with open(output_path, "w") as output_file:
+        write_summary(output_file, monthly_sales, yearly_lines, grand_total)
+
+    # Display the results
+    if echo:
+        sys.stdout.write("\n")
+        write_summary(sys.stdout, monthly_sales, yearly_lines, grand_total)
+        sys.stdout.write("\n")
+
+
+def run_queries(args):
+    """Answer --total / --top from the command line, always through the cache."""
+    index = SalesIndex.cached(args.source)
+
+    try:
+        first_month, last_month = parse_months(args.months, index.months)
+        if args.total is not None:
+            total = index.range_total(args.total, first_month, last_month)
+            print(f"{args.total} (months {first_month}-{last_month}): {total}")
+        if args.top is not None:
+            ranking = index.top_n(args.top, first_month, last_month)
+            print(f"Top {args.top} manufacturers (months {first_month}-{last_month}):")
+            for rank, (company, total) in enumerate(ranking, 1):
+                print(f"{rank}. {company}: {total}")
+    except KeyError as e:
+        print(f"Error: {e.args[0]}")
+        return 1
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise monthly car sales per manufacturer.")
+    parser.add_argument("source", nargs="?", default=SALES_FILE,
+                        help="sales file to read, or a directory / glob pattern of regional files")
+    parser.add_argument("-o", "--output", default=SUMMARY_FILE, help="summary file to write")
+    parser.add_argument("--stats", action="store_true",
+                        help="load the file into memory and also show per-manufacturer statistics")
+    parser.add_argument("--cache", action="store_true",
+                        help=f"reuse a memory-mapped binary copy of the parsed file (kept in {CACHE_DIR}/); "
+                             "--total and --top always do")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"keep running totals in {CACHE_DIR}/ and only read data appended since the last run")
+    parser.add_argument("--total", metavar="MANUFACTURER",
+                        help="print one manufacturer's total over --months instead of writing the summary")
+    parser.add_argument("--top", type=int, metavar="N",
+                        help="print the N best-selling manufacturers over --months instead of writing the summary")
+    parser.add_argument("--months", default="",
+                        help='month range for --total/--top, e.g. "3-7", "5" or "Q2" (default: all months)')
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes for directory / glob input (default: all cores)")
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.source) or any(ch in args.source for ch in "*?["):
+        single_file_only = [flag for flag, used in (("--stats", args.stats), ("--cache", args.cache),
+                                                    ("--incremental", args.incremental),
+                                                    ("--total", args.total is not None),
+                                                    ("--top", args.top is not None)) if used]
+        if single_file_only:
+            parser.error(f"{', '.join(single_file_only)} cannot be used with a directory or glob source")
+        paths = expand_sources(args.source)
+        if not paths:
+            print(f"Error: No sales files match '{args.source}'.")
+            return 1
+        summarise_files(paths, args.output, args.workers)
+        print(f"\nResults have been saved to '{args.output}'")
+        return 0
+
+    # Check if the file exists
+    if not os.path.exists(args.source):
+        print(f"Error: The file '{args.source}' does not exist.")
+        return 1
+
+    if args.total is not None or args.top is not None:
+        return run_queries(args)
 
-    output_file.write("\nYearly sales totals by manufacturer:\n")
-    for company, total in zip(companies, yearly_sales):
-        output_file.write(f"{company}: {total}\n")
+    if args.incremental:
+        summarise_incremental(args.source, args.output)
+    elif args.stats or args.cache:
+        if args.cache:
+            companies, sales = load_sales_cached(args.source)
+        else:
+            companies, sales = load_sales(args.source)
+        report = summarise_sales(companies, sales, args.output)
+        if args.stats:
+            write_statistics(sys.stdout, companies, report)
+    else:
+        summarise_file(args.source, args.output)
+    print(f"\nResults have been saved to '{args.output}'")
+    return 0
 
-    output_file.write("\nGrand total of all car.py sales: " + str(grand_total))
 
-print("\nResults have been saved to 'car_sales_summary.txt'")
+if __name__ == "__main__":
+    sys.exit(main())
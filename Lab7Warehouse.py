@@ -0,0 +1,185 @@
+import argparse
+import sqlite3
+import sys
+from itertools import islice
+
+from Lab7Task import SUMMARY_FILE, iter_records, save_summary
+
+# Database file constant
+DB_FILE = "car_sales.db"
+
+# Rows sent to SQLite per executemany() call while loading
+BATCH_SIZE = 10000
+
+
+def connect(db_file=None):
+    """Open the warehouse database with settings suited to bulk loading."""
+    conn = sqlite3.connect(db_file or DB_FILE)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def init_warehouse(conn):
+    """
+    Create the warehouse tables if they do not exist yet.
+    monthly_sales is keyed (manufacturer_id, month) WITHOUT ROWID, so the primary key
+    itself covers per-manufacturer lookups; the rollup tables hold precomputed totals.
+    """
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS manufacturer (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS monthly_sales (
+        manufacturer_id INTEGER NOT NULL REFERENCES manufacturer(id),
+        month INTEGER NOT NULL,
+        units INTEGER NOT NULL,
+        PRIMARY KEY (manufacturer_id, month)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS month_totals (
+        month INTEGER PRIMARY KEY,
+        units INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS manufacturer_totals (
+        manufacturer_id INTEGER PRIMARY KEY REFERENCES manufacturer(id),
+        units INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS grand_total (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        units INTEGER NOT NULL
+    );
+    """)
+
+
+def create_indexes(conn):
+    """Covering index for month-first scans; built after loading so inserts stay cheap."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_monthly_sales_month "
+                 "ON monthly_sales (month, units)")
+
+
+def load_sales_file(conn, path, append=False, batch_size=BATCH_SIZE):
+    """
+    Stream a carSale.csv-style file into the manufacturer and monthly_sales tables.
+    By default the warehouse is replaced with the file's contents; with append=True
+    the units are added to what is already stored (e.g. one file per region).
+    Returns the number of manufacturer records read from the file.
+    """
+    init_warehouse(conn)
+    with conn:
+        if not append:
+            conn.execute("DROP INDEX IF EXISTS idx_monthly_sales_month")
+            for table in ("monthly_sales", "manufacturer_totals", "month_totals", "grand_total", "manufacturer"):
+                conn.execute(f"DELETE FROM {table}")
+
+        # Manufacturer ids are handed out here so each record needs no extra lookup query.
+        ids = dict(conn.execute("SELECT name, id FROM manufacturer"))
+        next_id = max(ids.values(), default=0) + 1
+        new_manufacturers = []
+        records = 0
+
+        def rows():
+            nonlocal next_id, records
+            for company, sales in iter_records(path):
+                records += 1
+                manufacturer_id = ids.get(company)
+                if manufacturer_id is None:
+                    manufacturer_id = ids[company] = next_id
+                    next_id += 1
+                    new_manufacturers.append((manufacturer_id, company))
+                for month, units in enumerate(sales, 1):
+                    yield manufacturer_id, month, units
+
+        row_iter = rows()
+        while True:
+            batch = list(islice(row_iter, batch_size))
+            if not batch:
+                break
+            # Manufacturers first so every sales row refers to an existing id.
+            conn.executemany("INSERT INTO manufacturer (id, name) VALUES (?, ?)", new_manufacturers)
+            new_manufacturers.clear()
+            conn.executemany("""
+            INSERT INTO monthly_sales (manufacturer_id, month, units) VALUES (?, ?, ?)
+            ON CONFLICT (manufacturer_id, month) DO UPDATE SET units = units + excluded.units
+            """, batch)
+        conn.executemany("INSERT INTO manufacturer (id, name) VALUES (?, ?)", new_manufacturers)
+
+        create_indexes(conn)
+        refresh_rollups(conn)
+    return records
+
+
+def refresh_rollups(conn):
+    """Recompute the month, manufacturer and grand total rollup tables."""
+    conn.execute("DELETE FROM month_totals")
+    conn.execute("""
+    INSERT INTO month_totals (month, units)
+    SELECT month, SUM(units) FROM monthly_sales GROUP BY month
+    """)
+    conn.execute("DELETE FROM manufacturer_totals")
+    conn.execute("""
+    INSERT INTO manufacturer_totals (manufacturer_id, units)
+    SELECT manufacturer_id, SUM(units) FROM monthly_sales GROUP BY manufacturer_id
+    """)
+    conn.execute("""
+    INSERT OR REPLACE INTO grand_total (id, units)
+    SELECT 1, COALESCE(SUM(units), 0) FROM month_totals
+    """)
+
+
+def monthly_totals(conn):
+    """Total units per month, in month order."""
+    return [units for _, units in conn.execute("SELECT month, units FROM month_totals ORDER BY month")]
+
+
+def yearly_totals(conn):
+    """Cursor over (manufacturer, total units) rows in load order."""
+    return conn.execute("""
+    SELECT m.name, t.units
+    FROM manufacturer_totals AS t JOIN manufacturer AS m ON m.id = t.manufacturer_id
+    ORDER BY t.manufacturer_id
+    """)
+
+
+def grand_total(conn):
+    """Grand total of all units sold."""
+    row = conn.execute("SELECT units FROM grand_total WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def write_report(conn, output_path=SUMMARY_FILE, echo=True):
+    """Write car_sales_summary.txt straight from the rollup tables."""
+    save_summary(output_path, monthly_totals(conn), yearly_totals(conn), grand_total(conn), echo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load car sales into SQLite and report from it.")
+    parser.add_argument("--db", default=DB_FILE, help="warehouse database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="load one or more sales files")
+    load.add_argument("sources", nargs="+", help="sales files to load")
+    load.add_argument("--append", action="store_true", help="add to the stored data instead of replacing it")
+
+    report = commands.add_parser("report", help="write the summary from the warehouse")
+    report.add_argument("-o", "--output", default=SUMMARY_FILE, help="summary file to write")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        if args.command == "load":
+            for i, source in enumerate(args.sources):
+                # Several files in one command are always combined.
+                count = load_sales_file(conn, source, append=args.append or i > 0)
+                print(f"Loaded {count} manufacturer record(s) from '{source}'.")
+        else:
+            init_warehouse(conn)
+            write_report(conn, args.output)
+            print(f"\nResults have been saved to '{args.output}'")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
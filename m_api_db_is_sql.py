@@ -1,10 +1,49 @@
 import sqlite3
+import sys
+from typing import NamedTuple, Optional
+
 import requests
 
 # Database file constant
 DB_FILE = "pokemon.db"
 
 
+class PokemonRecord(NamedTuple):
+    """
+    A single Pokémon record.
+    Field order matches the columns of the 'pokemon' table so rows can be built
+    straight from the cursor; the imperial conversions are only set on fetched data.
+    """
+    id: int
+    name: str
+    height: float
+    weight: float
+    types: str
+    abilities: str
+    weaknesses: str
+    strengths: str
+    evolutions: str
+    strength_level: int
+    height_ft: Optional[float] = None
+    weight_lbs: Optional[float] = None
+
+
+# Number of fields stored in the database (everything except the imperial conversions)
+DB_FIELD_COUNT = 10
+
+
+def _record_factory(cursor, row):
+    """sqlite3 row factory turning each row into a PokemonRecord."""
+    return PokemonRecord(*row)
+
+
+def _connect():
+    """Open a connection that returns PokemonRecord rows."""
+    conn = sqlite3.connect(DB_FILE)
+    conn.row_factory = _record_factory
+    return conn
+
+
 def init_db():
     """
     Initialize the SQLite database.
@@ -34,8 +73,8 @@ def init_db():
 
 
 # Modular CRUD Functions
-def create_record(data):
-    """Insert or update Pokémon data into the database."""
+def create_record(record):
+    """Insert or update a PokemonRecord in the database."""
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
     insert_query = """
@@ -43,26 +82,15 @@ def create_record(data):
     (id, name, height, weight, types, abilities, weaknesses, strengths, evolutions, strength_level)
     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
-    cursor.execute(insert_query, (
-        data.get("id"),
-        data.get("name"),
-        data.get("height"),
-        data.get("weight"),
-        data.get("types"),
-        data.get("abilities"),
-        data.get("weaknesses"),
-        data.get("strengths"),
-        data.get("evolutions"),
-        data.get("strength_level")
-    ))
+    cursor.execute(insert_query, record[:DB_FIELD_COUNT])
     conn.commit()
     conn.close()
-    print(f"\nRecord for {data.get('name').capitalize()} (ID: {data.get('id')}) added/updated successfully.\n")
+    print(f"\nRecord for {record.name.capitalize()} (ID: {record.id}) added/updated successfully.\n")
 
 
 def read_all_records():
-    """Retrieve and return all Pokémon records from the database."""
-    conn = sqlite3.connect(DB_FILE)
+    """Retrieve and return all Pokémon records from the database as PokemonRecord rows."""
+    conn = _connect()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM pokemon")
     records = cursor.fetchall()
@@ -71,8 +99,8 @@ def read_all_records():
 
 
 def read_record_by_id(pokemon_id):
-    """Retrieve a Pokémon record by its ID."""
-    conn = sqlite3.connect(DB_FILE)
+    """Retrieve a Pokémon record by its ID (a PokemonRecord, or None)."""
+    conn = _connect()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM pokemon WHERE id = ?", (pokemon_id,))
     record = cursor.fetchone()
@@ -82,7 +110,7 @@ def read_record_by_id(pokemon_id):
 
 def search_by_name(name):
     """Search for Pokémon records by name (case-insensitive)."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = _connect()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM pokemon WHERE LOWER(name) = LOWER(?)", (name,))
     records = cursor.fetchall()
@@ -215,23 +243,63 @@ def fetch_pokemon_data(pokemon_identifier):
         print("Error fetching evolution chain:", e)
         evolutions_str = "N/A"
 
-    # Compile all data into a dictionary
-    pokemon_data = {
-        "id": poke_id,
-        "name": name,
-        "height": height_m,  # in metres
-        "weight": weight_kg,  # in kilograms
-        "types": types_str,
-        "abilities": abilities_str,
-        "weaknesses": weaknesses_str,
-        "strengths": strengths_str,
-        "evolutions": evolutions_str,
-        "strength_level": strength_level,
-        "height_ft": height_ft,
-        "weight_lbs": weight_lbs
-    }
-
-    return pokemon_data
+    # Compile all data into a single record
+    return PokemonRecord(
+        id=poke_id,
+        name=name,
+        height=height_m,  # in metres
+        weight=weight_kg,  # in kilograms
+        types=types_str,
+        abilities=abilities_str,
+        weaknesses=weaknesses_str,
+        strengths=strengths_str,
+        evolutions=evolutions_str,
+        strength_level=strength_level,
+        height_ft=height_ft,
+        weight_lbs=weight_lbs
+    )
+
+
+# Templates are filled positionally from the record itself, so no per-record dict is built.
+_STORED_TEMPLATE = (
+    "Id: {0}\n"
+    "Name: {name}\n"
+    "Height: {2} m\n"
+    "Weight: {3} kg\n"
+    "Types: {4}\n"
+    "Abilities: {5}\n"
+    "Battlefield or Pokémon weakness against type: {6}\n"
+    "Battlefield or Pokémon strength against type: {7}\n"
+    "Evolutions: {8}\n"
+    "Strength Level: {9}\n"
+)
+
+_FETCHED_TEMPLATE = (
+    "Id: {0}\n"
+    "Name: {name}\n"
+    "Height: {2} m ({10} ft)\n"
+    "Weight: {3} kg ({11} lbs)\n"
+    "Types: {4}\n"
+    "Strength Level: {9}\n"
+    "Abilities: {5}\n"
+    "Battlefield or Pokémon weakness against type: {6}\n"
+    "Battlefield or Pokémon strength against type: {7}\n"
+    "Evolutions: {8}\n"
+    # Provide a Wikipedia link based on the Pokémon name
+    "More info please go to wiki link: https://en.wikipedia.org/wiki/{name}\n"
+)
+
+
+def render_record(record, heading, out=None):
+    """
+    Write a PokemonRecord to 'out' under the given heading.
+    Records fetched from the API include the imperial conversions and a wiki link;
+    records read back from the database show the stored columns only.
+    """
+    out = out or sys.stdout
+    template = _FETCHED_TEMPLATE if record.height_ft is not None else _STORED_TEMPLATE
+    out.write(heading + "\n")
+    out.write(template.format(*record, name=record.name.capitalize()))
 
 
 def display_fetched_data(data):
@@ -240,20 +308,8 @@ def display_fetched_data(data):
         print("No data to display.")
         return
 
-    print("\nFetched Pokémon Data:")
-    print(f"Id: {data.get('id')}")
-    print(f"Name: {data.get('name').capitalize()}")
-    print(f"Height: {data.get('height')} m ({data.get('height_ft')} ft)")
-    print(f"Weight: {data.get('weight')} kg ({data.get('weight_lbs')} lbs)")
-    print(f"Types: {data.get('types')}")
-    print(f"Strength Level: {data.get('strength_level')}")
-    print(f"Abilities: {data.get('abilities')}")
-    print(f"Battlefield or Pokémon weakness against type: {data.get('weaknesses')}")
-    print(f"Battlefield or Pokémon strength against type: {data.get('strengths')}")
-    print(f"Evolutions: {data.get('evolutions')}")
-    # Provide a Wikipedia link based on the Pokémon name
-    wiki_link = f"https://en.wikipedia.org/wiki/{data.get('name').capitalize()}"
-    print(f"More info please go to wiki link: {wiki_link}\n")
+    render_record(data, "\nFetched Pokémon Data:")
+    print()
 
 
 # CLI
@@ -293,17 +349,7 @@ def cli_menu():
             records = read_all_records()
             if records:
                 for record in records:
-                    print("\n--- Record ---")
-                    print(f"Id: {record[0]}")
-                    print(f"Name: {record[1].capitalize()}")
-                    print(f"Height: {record[2]} m")
-                    print(f"Weight: {record[3]} kg")
-                    print(f"Types: {record[4]}")
-                    print(f"Abilities: {record[5]}")
-                    print(f"Battlefield or Pokémon weakness against type: {record[6]}")
-                    print(f"Battlefield or Pokémon strength against type: {record[7]}")
-                    print(f"Evolutions: {record[8]}")
-                    print(f"Strength Level: {record[9]}")
+                    render_record(record, "\n--- Record ---")
                 print("")
             else:
                 print("No records found.")
@@ -312,17 +358,8 @@ def cli_menu():
                 search_id = int(input("Enter Pokémon ID to search: "))
                 record = read_record_by_id(search_id)
                 if record:
-                    print("\n--- Record Found ---")
-                    print(f"Id: {record[0]}")
-                    print(f"Name: {record[1].capitalize()}")
-                    print(f"Height: {record[2]} m")
-                    print(f"Weight: {record[3]} kg")
-                    print(f"Types: {record[4]}")
-                    print(f"Abilities: {record[5]}")
-                    print(f"Battlefield or Pokémon weakness against type: {record[6]}")
-                    print(f"Battlefield or Pokémon strength against type: {record[7]}")
-                    print(f"Evolutions: {record[8]}")
-                    print(f"Strength Level: {record[9]}\n")
+                    render_record(record, "\n--- Record Found ---")
+                    print()
                 else:
                     print("Record not found.")
             except ValueError:
@@ -332,17 +369,8 @@ def cli_menu():
             records = search_by_name(name)
             if records:
                 for record in records:
-                    print("\n--- Record Found ---")
-                    print(f"Id: {record[0]}")
-                    print(f"Name: {record[1].capitalize()}")
-                    print(f"Height: {record[2]} m")
-                    print(f"Weight: {record[3]} kg")
-                    print(f"Types: {record[4]}")
-                    print(f"Abilities: {record[5]}")
-                    print(f"Battlefield or Pokémon weakness against type: {record[6]}")
-                    print(f"Battlefield or Pokémon strength against type: {record[7]}")
-                    print(f"Evolutions: {record[8]}")
-                    print(f"Strength Level: {record[9]}\n")
+                    render_record(record, "\n--- Record Found ---")
+                    print()
             else:
                 print(f"No records found for Pokémon name '{name}'.")
         elif choice == "5":
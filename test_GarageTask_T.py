@@ -0,0 +1,363 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from GarageTask_T import (Car, ColumnarGarage, ConcurrentGarage, Garage, IndexedGarage, Motorbike, PersistentGarage,
+                          RWLock, Truck, export_vehicles, load_vehicles, register_rate, register_vehicle_type)
+
+
+def make_car(vehicle_id, cls=Car):
+    return cls(vehicle_id, "Ford", "Focus", 2015, 1000 * vehicle_id, "Petrol", 4, "conventional", "Metallic")
+
+
+class Van(Car):
+    __slots__ = ()
+
+
+register_rate(Van, 120.0, 0.02)
+
+
+class PersistentGarageTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "garage.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def open(self, **kwargs):
+        return PersistentGarage(self.path, **kwargs)
+
+    def ids(self, garage):
+        return [v.vehicle_id for v in garage.vehicles]
+
+    def test_failed_add_changes_neither_memory_nor_journal(self):
+        with self.open() as garage:
+            garage.add_vehicle(make_car(1))
+            with self.assertRaises(ValueError):
+                garage.add_vehicle(make_car(2, Van))
+            with self.assertRaises(ValueError):
+                garage.add_vehicles([make_car(3), make_car(4, Van)])
+            self.assertEqual(self.ids(garage), [1])
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), [1])
+
+    def test_removals_survive_reopening(self):
+        with self.open() as garage:
+            truck = Truck(3, "Volvo", "FH", 2020, 5, "Diesel", 2.0, "6x4", "8ft", False)
+            garage.add_vehicles([make_car(1), make_car(2), truck])
+            garage.remove_vehicle_by_id(1)
+            garage.remove_vehicle_by_type(Truck)
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), [2])
+            garage.empty_garage()
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), [])
+
+    def test_entry_missing_its_newline_is_dropped(self):
+        with self.open() as garage:
+            garage.add_vehicle(make_car(1))
+            garage.add_vehicle(make_car(2))
+        with open(self.path + ".journal", "rb+") as journal:
+            journal.truncate(os.path.getsize(self.path + ".journal") - 1)
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), [1])
+            garage.add_vehicle(make_car(3))
+            garage.add_vehicle(make_car(4))
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), [1, 3, 4])
+
+    def test_torn_last_line_is_truncated(self):
+        with self.open() as garage:
+            garage.add_vehicle(make_car(1))
+        with open(self.path + ".journal", "a", encoding="utf-8") as journal:
+            journal.write('{"seq": 2, "op": "add", "vehi')
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), [1])
+            garage.add_vehicle(make_car(2))
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), [1, 2])
+
+    def test_compaction_writes_snapshot_and_empties_journal(self):
+        with self.open(compact_after=3) as garage:
+            for vehicle_id in range(1, 8):
+                garage.add_vehicle(make_car(vehicle_id))
+            garage.compact(background=False)
+        self.assertEqual(os.path.getsize(self.path + ".journal"), 0)
+        self.assertFalse(os.path.exists(self.path + ".journal.old"))
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), list(range(1, 8)))
+
+    def test_interrupted_compaction_is_finished_on_open(self):
+        with self.open() as garage:
+            garage.add_vehicles([make_car(1), make_car(2)])
+            garage.compact(background=False)
+            garage.add_vehicle(make_car(3))
+            garage.remove_vehicle_by_id(1)
+        # As if the process died after rotating the journal but before the snapshot was written.
+        os.replace(self.path + ".journal", self.path + ".journal.old")
+        with open(self.path + ".journal", "w", encoding="utf-8"):
+            pass
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), [2, 3])
+        self.assertFalse(os.path.exists(self.path + ".journal.old"))
+        with self.open() as garage:
+            self.assertEqual(self.ids(garage), [2, 3])
+
+
+class Limo(Car):
+    # No __slots__, so its instance dict travels with it through ColumnarGarage.
+    pass
+
+
+register_rate(Limo, 500.0, 1.0)
+register_vehicle_type(Limo)
+
+
+class ColumnarGarageTest(unittest.TestCase):
+    def fleet(self, first_id, count):
+        vehicles = []
+        for vehicle_id in range(first_id, first_id + count):
+            if vehicle_id % 2:
+                vehicle = make_car(vehicle_id, Limo)
+                vehicle.chauffeur = f"driver {vehicle_id}"
+            else:
+                vehicle = Truck(vehicle_id, "Volvo", "FH", 2020, vehicle_id, "Diesel", 2.0, "6x4", "8ft", False)
+            vehicles.append(vehicle)
+        return vehicles
+
+    def test_billing_matches_garage_after_a_class_is_gone(self):
+        columnar, plain = ColumnarGarage(), Garage()
+        for garage in (columnar, plain):
+            garage.add_vehicles(self.fleet(1, 10))
+            garage.remove_vehicle_by_type(Limo)
+        self.assertEqual(columnar.fix_all_vehicles().subtotals, plain.fix_all_vehicles().subtotals)
+
+    def test_iteration_and_export_keep_instance_fields(self):
+        garage = ColumnarGarage()
+        garage.add_vehicles(self.fleet(1, 4))
+        self.assertEqual([getattr(v, "chauffeur", None) for v in garage], ["driver 1", None, "driver 3", None])
+        tmp = tempfile.mkdtemp()
+        try:
+            self.assertEqual(export_vehicles(garage, os.path.join(tmp, "fleet.jsonl")), 4)
+        finally:
+            shutil.rmtree(tmp)
+
+    def test_removed_rows_free_their_dictionary_entries(self):
+        garage = ColumnarGarage()
+        for round_no in range(5):
+            garage.add_vehicles(self.fleet(round_no * 100, 100))
+            garage.remove_vehicle_by_id(round_no * 100 + 1)
+            garage.remove_vehicle_by_type(Limo)
+        self.assertLessEqual(len(garage._extras_pool), 51)
+        garage.empty_garage()
+        self.assertEqual((garage._extras_pool, garage._strings, garage._classes), ([], [], []))
+
+
+class RWLockTest(unittest.TestCase):
+    def test_reads_and_writes_nest_on_one_thread(self):
+        lock = RWLock()
+        with lock.write():
+            with lock.read():
+                with lock.write():
+                    pass
+        with lock.read():
+            with lock.read():
+                pass
+        # Fully released: another thread can write straight away.
+
+        def write():
+            with lock.write():
+                pass
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer.join(1)
+        self.assertFalse(writer.is_alive())
+
+    def test_read_cannot_be_upgraded(self):
+        lock = RWLock()
+        with lock.read():
+            with self.assertRaises(RuntimeError):
+                with lock.write():
+                    pass
+
+    def test_waiting_writer_goes_before_new_readers(self):
+        lock = RWLock()
+        order = []
+
+        def write():
+            with lock.write():
+                order.append("writer")
+
+        def read():
+            with lock.read():
+                order.append("reader")
+
+        with lock.read():
+            writer = threading.Thread(target=write)
+            writer.start()
+            while not lock._writers_waiting:
+                time.sleep(0.001)
+            reader = threading.Thread(target=read)
+            reader.start()
+            time.sleep(0.05)
+            self.assertEqual(order, [])
+        writer.join(1)
+        reader.join(1)
+        self.assertEqual(order, ["writer", "reader"])
+
+
+class ConcurrentGarageTest(unittest.TestCase):
+    def test_billing_runs_alongside_adds_and_removals(self):
+        garage = ConcurrentGarage()
+        errors, results = [], []
+
+        def churn(first_id):
+            try:
+                for vehicle_id in range(first_id, first_id + 500):
+                    garage.add_vehicle(make_car(vehicle_id))
+                    if vehicle_id % 3 == 0:
+                        garage.remove_vehicle_by_id(vehicle_id)
+            except Exception as e:
+                errors.append(e)
+
+        def bill():
+            try:
+                for _ in range(50):
+                    results.append(garage.fix_all_vehicles())
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=churn, args=(first_id,)) for first_id in (0, 1000, 2000)]
+        threads += [threading.Thread(target=bill) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for result in results:
+            # Each bill is a consistent snapshot: one bill per vehicle, totals that add up.
+            self.assertEqual(len(result.vehicle_ids), len(result.bills))
+            self.assertEqual(len(set(result.vehicle_ids.tolist())), len(result.vehicle_ids))
+            self.assertAlmostEqual(result.grand_total, float(result.bills.sum()), places=6)
+        expected = {i for first_id in (0, 1000, 2000) for i in range(first_id, first_id + 500) if i % 3}
+        self.assertEqual({v.vehicle_id for v in garage.vehicles}, expected)
+
+
+class IndexedGarageTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.garage = IndexedGarage()
+        vehicles = []
+        # Enough vehicles that the mileage index splits into several blocks.
+        for vehicle_id in range(6000):
+            common = (vehicle_id, rng.choice(["Ford", "BMW", "Volvo"]), "M", rng.randint(2000, 2024),
+                      rng.choice([0, 100000, 300000, rng.randint(0, 300000)]),
+                      rng.choice(["Petrol", "Diesel", "Electric"]))
+            kind = vehicle_id % 3
+            if kind == 0:
+                vehicles.append(Car(*common, 4, "conventional", "Metallic"))
+            elif kind == 1:
+                vehicles.append(Motorbike(*common, "Manual", 2, "Panniers", "650cc"))
+            else:
+                vehicles.append(Truck(*common, 2.0, "6x4", "8ft", False))
+        self.garage.add_vehicles(vehicles)
+
+    def brute(self, keep):
+        return sorted(v.vehicle_id for v in self.garage.vehicles if keep(v))
+
+    def check_queries(self):
+        garage = self.garage
+        self.assertEqual(garage.query().of_type(Truck).fuel_type("Petrol").mileage_above(100000)
+                         .built_before(2015).ids(),
+                         self.brute(lambda v: isinstance(v, Truck) and v.fuel_type == "Petrol"
+                                    and v.mileage > 100000 and v.year < 2015))
+        for low, high in [(100000, 100000), (0, 0), (300000, 300000), (-5, 10), (250000, None), (None, 50)]:
+            self.assertEqual(garage.query().mileage_between(low, high).ids(),
+                             self.brute(lambda v: (low is None or v.mileage >= low)
+                                        and (high is None or v.mileage <= high)))
+        self.assertEqual(garage.query().mileage_between(0, 300000, include_low=False, include_high=False).ids(),
+                         self.brute(lambda v: 0 < v.mileage < 300000))
+        self.assertEqual(garage.query().mileage_below(100000).make("Ford", "BMW").built_between(2010, 2012).ids(),
+                         self.brute(lambda v: v.mileage < 100000 and v.make in ("Ford", "BMW")
+                                    and 2010 <= v.year <= 2012))
+        self.assertEqual(garage.query().ids(), self.brute(lambda v: True))
+        entries = list(garage._by_mileage)
+        self.assertEqual(entries, sorted((v.mileage, v.vehicle_id) for v in garage.vehicles))
+        self.assertEqual(len(garage._by_mileage), len(garage))
+
+    def test_queries_match_a_full_scan(self):
+        self.assertGreater(len(self.garage._by_mileage._blocks), 2)
+        self.check_queries()
+
+    def test_indexes_follow_every_removal(self):
+        garage = self.garage
+        for vehicle_id in range(0, 6000, 7):
+            garage.remove_vehicle_by_id(vehicle_id)
+        self.check_queries()
+        # Few removals delete entries one by one, many rebuild the mileage index.
+        few = [make_car(vehicle_id, Van) for vehicle_id in range(10000, 10003)]
+        garage.add_vehicles(few)
+        self.assertEqual(len(garage.remove_vehicle_by_type(Van)), 3)
+        self.check_queries()
+        garage.remove_multiple_by_types([Car, Motorbike])
+        self.check_queries()
+        garage.empty_garage()
+        self.check_queries()
+        self.assertEqual((garage._by_make, garage._by_fuel, garage._by_year), ({}, {}, {}))
+
+
+class LoadVehiclesTest(unittest.TestCase):
+    GOOD = ('{"type": "car", "vehicle_id": 1, "make": "Ford", "model": "Focus", "year": 2015, "mileage": 100, '
+            '"fuel_type": "Petrol", "doors": 4, "door_style": "conventional", "finish": "Metallic"}')
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "fleet.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def load(self, *lines):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        garage, skipped = Garage(), []
+        load_vehicles(garage, self.path, on_invalid=lambda line_no, message: skipped.append(line_no))
+        return garage, skipped
+
+    def test_bad_lines_go_through_on_invalid(self):
+        fractional_year = self.GOOD.replace('"year": 2015', '"year": 2000.9')
+        whole_float_year = (self.GOOD.replace('"year": 2015', '"year": 2000.0')
+                            .replace('"vehicle_id": 1', '"vehicle_id": 2'))
+        garage, skipped = self.load(self.GOOD, "{not json", "[1, 2]", fractional_year, whole_float_year)
+        self.assertEqual(skipped, [2, 3, 4])
+        self.assertEqual([v.year for v in garage.vehicles], [2015, 2000])
+
+    def test_bad_line_raises_value_error_with_line_number(self):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(self.GOOD + "\n{not json\n")
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            load_vehicles(Garage(), self.path)
+
+    def test_duplicate_ids_are_reported_per_line(self):
+        lines = [self.GOOD.replace('"vehicle_id": 1', f'"vehicle_id": {vehicle_id}')
+                 for vehicle_id in (1, 2, 3, 4, 2, 5, 5)]
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        garage, skipped = Garage(), []
+        load_vehicles(garage, self.path, batch_size=3,
+                      on_invalid=lambda line_no, message: skipped.append(line_no))
+        self.assertEqual(skipped, [5, 7])
+        self.assertEqual([v.vehicle_id for v in garage.vehicles], [1, 2, 3, 4, 5])
+        with self.assertRaisesRegex(ValueError, "line 5: duplicate vehicle ID 2"):
+            load_vehicles(Garage(), self.path, batch_size=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
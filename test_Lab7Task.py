@@ -0,0 +1,126 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from Lab7Task import summarise_file, summarise_incremental
+
+
+class SummariseIncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "sales.csv")
+        self.state = os.path.join(self.tmp, "sales.state.json")
+        self.output = os.path.join(self.tmp, "summary.txt")
+        self.expected = os.path.join(self.tmp, "expected.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, text, mode="w"):
+        with open(self.path, mode) as file:
+            file.write(text)
+
+    def run_incremental(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return summarise_incremental(self.path, self.output, state_path=self.state, echo=False)
+
+    def assertMatchesFullRun(self, totals):
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = summarise_file(self.path, self.expected, echo=False)
+        self.assertEqual(totals.monthly_sales, expected.monthly_sales)
+        self.assertEqual(totals.grand_total, expected.grand_total)
+        self.assertEqual(totals.manufacturers, expected.manufacturers)
+        with open(self.output) as got, open(self.expected) as want:
+            self.assertEqual(got.read(), want.read())
+
+    def test_appends_match_full_run(self):
+        self.write("A\n1,2\nB\n3,4\n")
+        self.run_incremental()
+        self.write("C\n5,6\n", "a")
+        self.assertMatchesFullRun(self.run_incremental())
+
+    def test_repeated_manufacturer_keeps_separate_lines(self):
+        self.write("A\n1,1\n")
+        self.run_incremental()
+        self.write("A\n1,1\n", "a")
+        totals = self.run_incremental()
+        self.assertEqual(totals.manufacturers, 2)
+        self.assertMatchesFullRun(totals)
+
+    def test_unterminated_tail_is_read_again(self):
+        # The last numbers line was cut short: "1,2" is really "1,23".
+        self.write("A\n5,5\nB\n1,2")
+        totals = self.run_incremental()
+        self.assertEqual(totals.grand_total, 13)
+        self.write("3\nB\n7,7\n", "a")
+        self.assertMatchesFullRun(self.run_incremental())
+
+    def test_unterminated_tail_of_repeated_manufacturer(self):
+        self.write("A\n5,5\nA\n1")
+        self.run_incremental()
+        self.write("0\n", "a")
+        totals = self.run_incremental()
+        self.assertEqual(totals.grand_total, 20)
+        self.assertMatchesFullRun(totals)
+
+    def test_unterminated_tail_that_added_months(self):
+        # The tail first looks like it has a third month, then turns out to have four.
+        self.write("A\n1,1\nB\n2,2,2")
+        totals = self.run_incremental()
+        self.assertEqual(totals.monthly_sales, [3, 3, 2])
+        self.write(",2\n", "a")
+        totals = self.run_incremental()
+        self.assertEqual(totals.monthly_sales, [3, 3, 2, 2])
+        self.assertMatchesFullRun(totals)
+
+    def test_unterminated_tail_month_is_dropped_and_read_again(self):
+        # B's second month only exists in the tail, so it is removed with it and re-added as 22.
+        self.write("A\n1\nB\n2,2")
+        self.assertEqual(self.run_incremental().monthly_sales, [3, 2])
+        self.write("2\n", "a")
+        totals = self.run_incremental()
+        self.assertEqual(totals.monthly_sales, [3, 22])
+        self.assertMatchesFullRun(totals)
+
+    def test_unchanged_file_keeps_unterminated_tail(self):
+        self.write("A\n1,2\nB\n3,4")
+        first = self.run_incremental()
+        second = self.run_incremental()
+        self.assertEqual(first, second)
+        self.assertMatchesFullRun(second)
+
+    def test_malformed_record_reported_once(self):
+        self.write("A\n1,x\nB\n3,4\n")
+        self.assertEqual(self.run_incremental().skipped, 1)
+        self.write("C\n5,6\n", "a")
+        totals = self.run_incremental()
+        self.assertEqual(totals.skipped, 0)
+        self.assertMatchesFullRun(totals)
+
+    def test_replaced_file_is_rebuilt(self):
+        self.write("A\n1,2\nB\n3,4\n")
+        self.run_incremental()
+        self.write("X\n9,9\nB\n3,4\nC\n1,1\n")
+        self.assertMatchesFullRun(self.run_incremental())
+
+    def test_truncated_file_is_rebuilt(self):
+        self.write("A\n1,2\nB\n3,4\nC\n5,6\n")
+        self.run_incremental()
+        self.write("A\n1,2\n")
+        totals = self.run_incremental()
+        self.assertEqual(totals.grand_total, 3)
+        self.assertMatchesFullRun(totals)
+
+    def test_old_state_layout_is_rebuilt(self):
+        self.write("A\n1,1\nA\n2,2\n")
+        with open(self.state, "w") as file:
+            file.write('{"offset": 0, "lines": 0, "records": 0, "head_sha256": "", "monthly_sales": [],'
+                       ' "yearly_sales": {}, "grand_total": 0, "tail": null}')
+        self.assertMatchesFullRun(self.run_incremental())
+
+
+if __name__ == "__main__":
+    unittest.main()